@@ -0,0 +1,40 @@
+"""
+Ahead-of-time build of the Numba kernels
+
+    cd algotrading && python _kernels_aot.py
+
+writes the algo_kernels extension module next to this file. Kernels are
+looked up through _njit.prebuilt(), which falls back to the JIT versions when
+the module has not been built, so short demo runs skip compilation entirely.
+"""
+import os
+from numba.pycc import CC
+import indicators
+from examples import _custom_strategy_loop
+from momentum_strategy import _rebalance_kernel
+from vector_backtest import simulate_exits
+
+cc = CC('algo_kernels')
+cc.output_dir = os.path.dirname(os.path.abspath(__file__))
+
+SIGNATURES = {
+    indicators.sma: 'f8[:](f8[:], i8)',
+    indicators.ema: 'f8[:](f8[:], i8)',
+    indicators.smma: 'f8[:](f8[:], i8)',
+    indicators.rsi: 'f8[:](f8[:], i8)',
+    indicators.macd: 'Tuple((f8[:], f8[:]))(f8[:], i8, i8, i8)',
+    indicators.bbands: 'Tuple((f8[:], f8[:], f8[:]))(f8[:], i8, f8)',
+    indicators.crossover: 'f8[:](f8[:], f8[:])',
+    indicators.sma_cross: 'Tuple((f8[:], f8[:], f8[:]))(f8[:], i8, i8)',
+    _custom_strategy_loop: 'Tuple((b1[:], b1[:]))(f8[:], f8[:], f8[:], f8[:], f8[:], f8, f8, f8)',
+    _rebalance_kernel: 'void(f8[:], f8[:], i8, f8, i8[:], b1[:], i8[:])',
+    simulate_exits: 'UniTuple(i8, 2)(f8[:], i8, f8, f8, f8, i8)',
+}
+
+for kernel, signature in SIGNATURES.items():
+    cc.export(kernel.__name__, signature)(kernel.py_func)
+
+
+if __name__ == "__main__":
+    cc.compile()
+    print(f"Built algo_kernels in {cc.output_dir}")
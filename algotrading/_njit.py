@@ -0,0 +1,28 @@
+"""
+Optional Numba support - falls back to plain Python when Numba is missing
+"""
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+    prange = range
+    
+    def njit(*args, **kwargs):
+        """No-op stand-in for numba.njit"""
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+            
+        def decorator(func):
+            return func
+        return decorator
+
+try:
+    import algo_kernels  # optional prebuilt kernels, see _kernels_aot.py
+except ImportError:
+    algo_kernels = None
+
+
+def prebuilt(func):
+    """Ahead-of-time compiled version of a kernel if algo_kernels has been built"""
+    return getattr(algo_kernels, func.__name__, func)
@@ -3,78 +3,124 @@ Custom analyzers for performance metrics
 """
 import backtrader as bt
 import numpy as np
+from array import array
 from datetime import datetime
 
 
 class PerformanceAnalyzer(bt.Analyzer):
     """Comprehensive performance analyzer"""
     
+    TRADE_FIELDS = ('pnl', 'pnlcomm', 'size', 'price', 'value', 'commission')
+    
     def __init__(self):
         self.start_value = self.strategy.broker.getvalue()
         self.end_value = None
-        self.pnl = []
-        self.trades = []
-        self.drawdown = []
-        self.peak = self.start_value
+        
+        # Closed trades as typed columns, materialized into self.trades at stop()
+        self._trade_pnl = array('d')
+        self._trade_pnlcomm = array('d')
+        self._trade_size = array('d')
+        self._trade_price = array('d')
+        self._trade_value = array('d')
+        self._trade_commission = array('d')
+        self.trades = None
+        
+        # Preallocated per-bar portfolio values, sized to the preloaded data length.
+        # float32 is plenty for the drawdown; returns/Sharpe accumulate in Python floats
+        n = max(self.strategy.data.buflen(), 1)
+        self._values = np.empty(n, dtype=np.float32)
+        self._i = 0
+        self._max_dd = 0.0
+        self._dd_series = None
+        self._cached = None
+        
+        # Running mean/variance of bar-to-bar returns (Welford) for the Sharpe ratio
+        self._prev = self.start_value
+        self._n = 0
+        self._mean = 0.0
+        self._m2 = 0.0
+        
+    def start(self):
+        # Bound once - next() runs for every bar
+        self._getvalue = self.strategy.broker.getvalue
         
     def notify_trade(self, trade):
         if trade.isclosed:
-            self.trades.append({
-                'pnl': trade.pnl,
-                'pnlcomm': trade.pnlcomm,
-                'size': trade.size,
-                'price': trade.price,
-                'value': trade.value,
-                'commission': trade.commission
-            })
+            self._trade_pnl.append(trade.pnl)
+            self._trade_pnlcomm.append(trade.pnlcomm)
+            self._trade_size.append(trade.size)
+            self._trade_price.append(trade.price)
+            self._trade_value.append(trade.value)
+            self._trade_commission.append(trade.commission)
             
     def next(self):
-        value = self.strategy.broker.getvalue()
-        self.pnl.append(value - self.start_value)
+        i = self._i
+        if i == self._values.size:
+            self._values = np.resize(self._values, i * 2)
+        value = self._getvalue()
+        self._values[i] = value
+        self._i = i + 1
         
-        # Track drawdown
-        if value > self.peak:
-            self.peak = value
-        drawdown = (self.peak - value) / self.peak
-        self.drawdown.append(drawdown)
+        if i:
+            r = (value - self._prev) / self.start_value
+            self._n += 1
+            d = r - self._mean
+            self._mean += d / self._n
+            self._m2 += d * (r - self._mean)
+        self._prev = value
         
     def stop(self):
-        self.end_value = self.strategy.broker.getvalue()
+        self.end_value = self._getvalue()
+        self._cached = None
+        
+        self.trades = np.rec.fromarrays(
+            [np.frombuffer(getattr(self, '_trade_' + name), dtype=np.float64)
+             for name in self.TRADE_FIELDS],
+            names=self.TRADE_FIELDS
+        )
+        
+        # Drawdown is computed once over the whole equity curve
+        values = self._values[:self._i]
+        peak = np.maximum.accumulate(values)
+        np.maximum(peak, self.start_value, out=peak)
+        self._dd_series = (peak - values) / peak
+        self._max_dd = float(self._dd_series.max()) if values.size else 0.0
         
     def get_analysis(self):
+        # Reporting paths call this repeatedly once the run is over
+        if self._cached is not None:
+            return self._cached
+            
         total_return = (self.end_value - self.start_value) / self.start_value
         
         # Trade statistics
-        winning_trades = [t for t in self.trades if t['pnlcomm'] > 0]
-        losing_trades = [t for t in self.trades if t['pnlcomm'] <= 0]
+        pnlcomm = self.trades.pnlcomm
+        wins = pnlcomm[pnlcomm > 0]
+        losses = pnlcomm[pnlcomm <= 0]
         
-        total_trades = len(self.trades)
-        win_rate = len(winning_trades) / total_trades if total_trades > 0 else 0
+        total_trades = pnlcomm.size
+        win_rate = wins.size / total_trades if total_trades > 0 else 0
         
-        avg_win = np.mean([t['pnlcomm'] for t in winning_trades]) if winning_trades else 0
-        avg_loss = np.mean([t['pnlcomm'] for t in losing_trades]) if losing_trades else 0
+        avg_win = wins.mean() if wins.size else 0
+        avg_loss = losses.mean() if losses.size else 0
         
-        profit_factor = (sum([t['pnlcomm'] for t in winning_trades]) / 
-                        abs(sum([t['pnlcomm'] for t in losing_trades])) 
-                        if losing_trades and sum([t['pnlcomm'] for t in losing_trades]) != 0 else 0)
+        gross_loss = losses.sum()
+        profit_factor = wins.sum() / -gross_loss if gross_loss < 0 else 0
         
-        max_drawdown = max(self.drawdown) if self.drawdown else 0
+        max_drawdown = self._max_dd
         
         # Sharpe Ratio (simplified - assuming daily data)
-        if len(self.pnl) > 1:
-            returns = np.diff(self.pnl) / self.start_value
-            sharpe = np.mean(returns) / np.std(returns) * np.sqrt(252) if np.std(returns) > 0 else 0
-        else:
-            sharpe = 0
-            
-        return {
+        std = np.sqrt(self._m2 / self._n) if self._n else 0
+        sharpe = self._mean / std * np.sqrt(252) if std > 0 else 0
+        
+        self._cached = {
             'start_value': self.start_value,
             'end_value': self.end_value,
             'total_return': total_return,
             'total_return_pct': total_return * 100,
             'total_trades': total_trades,
-            'winning_trades': len(winning_trades),
-            'losing_trades': len(losing_trades),
+            'winning_trades': wins.size,
+            'losing_trades': losses.size,
             'win_rate': win_rate,
             'win_rate_pct': win_rate * 100,
             'avg_win': avg_win,
@@ -84,3 +130,4 @@ class PerformanceAnalyzer(bt.Analyzer):
             'max_drawdown_pct': max_drawdown * 100,
             'sharpe_ratio': sharpe
         }
+        return self._cached
@@ -4,10 +4,14 @@ Backtesting engine
 import backtrader as bt
 from datetime import datetime
 import pandas as pd
-import webbrowser
+import numpy as np
 import os
+import warnings
+from itertools import product
+from concurrent.futures import ProcessPoolExecutor
 from analyzers import PerformanceAnalyzer
-from report_generator import HTMLReportGenerator
+from data_handler import make_feed
+from report_generator import HTMLReportGenerator, open_in_browser
 
 
 class BacktestEngine:
@@ -28,7 +32,6 @@ class BacktestEngine:
         
         # Add analyzers
         self.cerebro.addanalyzer(PerformanceAnalyzer, _name='performance')
-        self.cerebro.addanalyzer(bt.analyzers.SharpeRatio, _name='sharpe', riskfreerate=0.02)
         self.cerebro.addanalyzer(bt.analyzers.DrawDown, _name='drawdown')
         self.cerebro.addanalyzer(bt.analyzers.TradeAnalyzer, _name='trades')
         self.cerebro.addanalyzer(bt.analyzers.Returns, _name='returns')
@@ -57,7 +60,10 @@ class BacktestEngine:
             
         print(f"\nStarting Portfolio Value: ${self.cerebro.broker.getvalue():,.2f}")
         
-        self.results = self.cerebro.run()
+        # Only the run itself is silenced - backtrader/pandas deprecation noise
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            self.results = self.cerebro.run()
         
         final_value = self.cerebro.broker.getvalue()
         print(f"Final Portfolio Value: ${final_value:,.2f}")
@@ -69,6 +75,25 @@ class BacktestEngine:
             
         return self.results
         
+    def run_param_grid(self, strategy_class, param_grid, maxcpus=None):
+        """Run a parameter sweep of one strategy via cerebro.optstrategy
+        
+        param_grid maps parameter names to lists of values. Returns a list of
+        (params, performance metrics) tuples, one per combination.
+        """
+        if self.cerebro is None:
+            raise ValueError("Cerebro not initialized. Add data first.")
+            
+        self.cerebro.optstrategy(strategy_class, **param_grid)
+        
+        # optreturn=True ships only params + analyzers back from the workers
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            runs = self.cerebro.run(maxcpus=maxcpus or os.cpu_count(), optreturn=True)
+        
+        return [(run[0].params._getkwargs(), run[0].analyzers.performance.get_analysis())
+                for run in runs]
+        
     def get_metrics(self):
         """Extract performance metrics"""
         if self.results is None:
@@ -79,9 +104,6 @@ class BacktestEngine:
         # Custom performance analyzer
         perf = strat.analyzers.performance.get_analysis()
         
-        # Sharpe Ratio
-        sharpe = strat.analyzers.sharpe.get_analysis()
-        
         # Drawdown
         drawdown = strat.analyzers.drawdown.get_analysis()
         
@@ -93,7 +115,6 @@ class BacktestEngine:
         
         metrics = {
             **perf,
-            'sharpe_ratio_bt': sharpe.get('sharperatio', 0),
             'max_drawdown_bt': drawdown.get('max', {}).get('drawdown', 0),
             'total_trades_bt': trades.get('total', {}).get('total', 0),
             'avg_return': returns.get('ravg', 0),
@@ -144,9 +165,7 @@ class BacktestEngine:
             )
             
             if open_browser:
-                # Open in browser
-                abs_path = os.path.abspath(report_file)
-                webbrowser.open('file://' + abs_path)
+                open_in_browser(report_file)
                 print(f"Opening report in browser...")
         
         return metrics
@@ -154,12 +173,21 @@ class BacktestEngine:
     def compare_strategies(self, results_list, strategy_names, 
                           generate_html=True, open_browser=True):
         """Compare multiple strategy results"""
-        comparison = []
+        perfs = [result[0].analyzers.performance.get_analysis() for result in results_list]
+        return self.compare_metrics(perfs, strategy_names, 
+                                    generate_html=generate_html, open_browser=open_browser)
         
-        for result, name in zip(results_list, strategy_names):
-            strat = result[0]
-            perf = strat.analyzers.performance.get_analysis()
-            
+    def compare_metrics(self, metrics_list, strategy_names, 
+                        generate_html=True, open_browser=True):
+        """Compare strategies from already-extracted performance metrics"""
+        # Order by return before building the frame instead of sorting the DataFrame
+        returns = np.fromiter((perf['total_return_pct'] for perf in metrics_list),
+                              dtype=np.float64, count=len(metrics_list))
+        order = np.argsort(-returns, kind='stable')
+        
+        comparison = []
+        for i in order:
+            perf, name = metrics_list[i], strategy_names[i]
             comparison.append({
                 'Strategy': name,
                 'Final Value': perf['end_value'],
@@ -172,7 +200,6 @@ class BacktestEngine:
             })
             
         df = pd.DataFrame(comparison)
-        df = df.sort_values('Return %', ascending=False)
         
         print("\n" + "="*100)
         print("STRATEGY COMPARISON")
@@ -188,8 +215,60 @@ class BacktestEngine:
             )
             
             if open_browser:
-                abs_path = os.path.abspath(report_file)
-                webbrowser.open('file://' + abs_path)
+                open_in_browser(report_file)
                 print(f"Opening comparison report in browser...")
         
         return df
+
+
+def run_backtest(strategy_class, data, params=None, initial_cash=100000, commission=0.001):
+    """Run one backtest on {symbol: DataFrame} data and return its metrics
+    
+    Top-level so it can be sent to worker processes: feeds and cerebro don't
+    pickle, so they are built inside the call from the DataFrames.
+    """
+    engine = BacktestEngine(initial_cash=initial_cash, commission=commission)
+    engine.setup_cerebro()
+    for symbol, df in data.items():
+        engine.add_data(make_feed(df, name=symbol), name=symbol)
+    engine.add_strategy(strategy_class, **(params or {}))
+    engine.run(plot=False)
+    return engine.get_metrics()
+
+
+def run_backtests(jobs, initial_cash=100000, commission=0.001, max_workers=None,
+                  while_running=None):
+    """Run independent (strategy_class, data, params) jobs across processes
+    
+    Returns the metrics dicts in job order. while_running, if given, is called
+    here once the jobs are submitted so I/O such as benchmark downloads
+    overlaps the backtests (without a download thread alive while workers fork).
+    """
+    workers = max_workers or min(len(jobs), os.cpu_count() or 1) or 1
+    with ProcessPoolExecutor(max_workers=workers) as ex:
+        futures = [
+            ex.submit(run_backtest, strategy_class, data, params, initial_cash, commission)
+            for strategy_class, data, params in jobs
+        ]
+        if while_running is not None:
+            while_running()
+        return [f.result() for f in futures]
+
+
+def run_grid(strategy_class, data, param_grid, initial_cash=100000, commission=0.001,
+             max_workers=None):
+    """Run a parameter sweep of one strategy on {symbol: DataFrame} data
+    
+    Same param_grid and return value as BacktestEngine.run_param_grid, but each
+    combination is a separate backtest spread over processes by run_backtests,
+    so it also works for multi-data strategies such as the momentum rotations.
+    """
+    names = list(param_grid)
+    combos = [dict(zip(names, values)) for values in product(*param_grid.values())]
+    metrics_list = run_backtests(
+        [(strategy_class, data, params) for params in combos],
+        initial_cash=initial_cash,
+        commission=commission,
+        max_workers=max_workers
+    )
+    return list(zip(combos, metrics_list))
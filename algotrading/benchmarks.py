@@ -1,9 +1,22 @@
 """
 Benchmark comparison utilities
 """
-import yfinance as yf
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 import pandas as pd
-from datetime import datetime
+from data_handler import fetch_history
+
+# Row layout of the strategy/benchmark comparison table
+COMPARISON_DTYPE = np.dtype([
+    ('Strategy', 'U64'),
+    ('Final Value', 'f8'),
+    ('Return %', 'f8'),
+    ('Total Trades', 'i4'),
+    ('Win Rate %', 'f8'),
+    ('Profit Factor', 'f8'),
+    ('Max DD %', 'f8'),
+    ('Sharpe Ratio', 'f8')
+])
 
 
 class BenchmarkComparator:
@@ -26,53 +39,63 @@ class BenchmarkComparator:
         self.initial_capital = initial_capital
         self.benchmark_data = {}
         
+        # Parse the period once; inflation math below is then plain float arithmetic
+        self._start_dt = np.datetime64(start_date)
+        self._end_dt = np.datetime64(end_date)
+        self._years = float((self._end_dt - self._start_dt) / np.timedelta64(1, 'D')) / 365.25
+        
     def download_benchmarks(self):
         """Download benchmark data"""
         print("\nDownloading benchmark data...")
         
-        for symbol, name in self.BENCHMARKS.items():
-            try:
-                print(f"  Downloading {name} ({symbol})...")
-                data = yf.download(
-                    symbol,
-                    start=self.start_date,
-                    end=self.end_date,
-                    progress=False
-                )
-                
-                if not data.empty:
-                    # Flatten multi-index if present
-                    if isinstance(data.columns, pd.MultiIndex):
-                        data.columns = data.columns.get_level_values(0)
-                    
-                    # Calculate return
-                    start_price = data['Close'].iloc[0]
-                    end_price = data['Close'].iloc[-1]
-                    total_return = ((end_price - start_price) / start_price) * 100
-                    final_value = self.initial_capital * (1 + total_return / 100)
-                    
-                    self.benchmark_data[symbol] = {
-                        'name': name,
-                        'start_price': start_price,
-                        'end_price': end_price,
-                        'total_return_pct': total_return,
-                        'final_value': final_value
-                    }
-                    print(f"    {name}: {total_return:.2f}% return")
-                else:
-                    print(f"    Warning: No data for {symbol}")
-                    
-            except Exception as e:
-                print(f"    Error downloading {symbol}: {e}")
+        # Fetch all benchmarks concurrently, then store them in BENCHMARKS order
+        with ThreadPoolExecutor(max_workers=len(self.BENCHMARKS)) as ex:
+            stats = list(ex.map(self._fetch_benchmark, self.BENCHMARKS.keys(), self.BENCHMARKS.values()))
+            
+        for symbol, data in zip(self.BENCHMARKS, stats):
+            if data is not None:
+                self.benchmark_data[symbol] = data
         
         return self.benchmark_data
     
+    def _fetch_benchmark(self, symbol, name):
+        """Download one benchmark and compute its buy-and-hold stats"""
+        try:
+            print(f"  Downloading {name} ({symbol})...")
+            data = fetch_history(symbol, self.start_date, self.end_date)
+            
+            if data.empty:
+                print(f"    Warning: No data for {symbol}")
+                return None
+            
+            close = np.ascontiguousarray(data['Close'].to_numpy(dtype=np.float64))
+            
+            # Calculate return
+            start_price, end_price = close[0], close[-1]
+            total_return = ((end_price - start_price) / start_price) * 100
+            final_value = self.initial_capital * (1 + total_return / 100)
+            
+            # Buy-and-hold max drawdown from the full price history
+            peak = np.maximum.accumulate(close)
+            max_drawdown = ((peak - close) / peak).max()
+            
+            print(f"    {name}: {total_return:.2f}% return")
+            return {
+                'name': name,
+                'start_price': start_price,
+                'end_price': end_price,
+                'total_return_pct': total_return,
+                'final_value': final_value,
+                'max_drawdown_pct': max_drawdown * 100
+            }
+            
+        except Exception as e:
+            print(f"    Error downloading {symbol}: {e}")
+            return None
+    
     def calculate_inflation_adjusted_return(self):
         """Calculate the impact of inflation"""
-        # Calculate number of years
-        start = datetime.strptime(self.start_date, "%Y-%m-%d")
-        end = datetime.strptime(self.end_date, "%Y-%m-%d")
-        years = (end - start).days / 365.25
+        years = self._years
         
         # Calculate inflation erosion
         inflation_factor = (1 + self.INFLATION_RATE) ** years
@@ -90,49 +113,36 @@ class BenchmarkComparator:
         }
     
     def get_benchmark_comparison(self):
-        """Get benchmark comparison data"""
-        benchmarks = []
+        """Get benchmark comparison rows as a COMPARISON_DTYPE structured array"""
+        rows = np.zeros(len(self.benchmark_data) + 1, dtype=COMPARISON_DTYPE)
         
         # Add inflation baseline
         inflation_data = self.calculate_inflation_adjusted_return()
-        benchmarks.append({
-            'Strategy': inflation_data['name'],
-            'Final Value': inflation_data['final_value'],
-            'Return %': inflation_data['total_return_pct'],
-            'Total Trades': 0,
-            'Win Rate %': 0.0,
-            'Profit Factor': 0.0,
-            'Max DD %': inflation_data['real_return_pct'],  # Use real return as "drawdown"
-            'Sharpe Ratio': 0.0
-        })
+        rows[0]['Strategy'] = inflation_data['name']
+        rows[0]['Final Value'] = inflation_data['final_value']
+        rows[0]['Return %'] = inflation_data['total_return_pct']
+        rows[0]['Max DD %'] = inflation_data['real_return_pct']  # Use real return as "drawdown"
         
-        # Add benchmark ETFs/funds
-        for symbol, data in self.benchmark_data.items():
-            benchmarks.append({
-                'Strategy': data['name'],
-                'Final Value': data['final_value'],
-                'Return %': data['total_return_pct'],
-                'Total Trades': 1,  # Buy and hold = 1 trade
-                'Win Rate %': 100.0 if data['total_return_pct'] > 0 else 0.0,
-                'Profit Factor': 0.0,  # Not applicable for buy-and-hold
-                'Max DD %': 0.0,  # Would need full price history to calculate properly
-                'Sharpe Ratio': 0.0  # Would need full price history to calculate properly
-            })
+        # Add benchmark ETFs/funds (Profit Factor and Sharpe stay 0 for buy-and-hold)
+        for row, data in zip(rows[1:], self.benchmark_data.values()):
+            row['Strategy'] = data['name']
+            row['Final Value'] = data['final_value']
+            row['Return %'] = data['total_return_pct']
+            row['Total Trades'] = 1  # Buy and hold = 1 trade
+            row['Win Rate %'] = 100.0 if data['total_return_pct'] > 0 else 0.0
+            row['Max DD %'] = data['max_drawdown_pct']
         
-        return benchmarks
+        return rows
     
     def add_benchmarks_to_comparison(self, strategy_results_df):
         """Add benchmarks to existing strategy comparison DataFrame"""
-        # Get benchmark data
-        benchmark_rows = self.get_benchmark_comparison()
-        
-        # Create benchmark DataFrame
-        benchmark_df = pd.DataFrame(benchmark_rows)
-        
-        # Combine with strategy results
-        combined_df = pd.concat([strategy_results_df, benchmark_df], ignore_index=True)
+        # Copy strategy results into the same record layout, field by field
+        strategy_rows = np.empty(len(strategy_results_df), dtype=COMPARISON_DTYPE)
+        for field in COMPARISON_DTYPE.names:
+            strategy_rows[field] = strategy_results_df[field].to_numpy()
         
-        # Sort by return
-        combined_df = combined_df.sort_values('Return %', ascending=False)
+        combined = np.concatenate([strategy_rows, self.get_benchmark_comparison()])
         
-        return combined_df
+        # Sort by return, then build the DataFrame once
+        order = np.argsort(-combined['Return %'], kind='stable')
+        return pd.DataFrame.from_records(combined[order])
@@ -1,14 +1,134 @@
 """
 Data handler for fetching and preparing market data
 """
-import yfinance as yf
+import asyncio
+import os
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
 import backtrader as bt
 from datetime import datetime
 
+# Shared by every script, keyed by (symbol, start, end)
+CACHE_DIR = os.path.expanduser("~/.cache/algotrading")
+
+# Positional layout read by bt.feeds.PandasDirectData (datetime comes from the index)
+FEED_COLUMNS = ['open', 'high', 'low', 'close', 'volume', 'openinterest']
+
+
+def _cache_path(symbol, start_date, end_date, cache_dir):
+    return os.path.join(cache_dir, f"{symbol}_{start_date}_{end_date}.parquet")
+
+
+def _write_cache(data, cache_path, symbol):
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        data.to_parquet(cache_path, engine='pyarrow', compression='zstd')
+    except (ImportError, OSError) as e:
+        print(f"Warning: Could not cache {symbol}: {e}")
+
+
+def fetch_history(symbol, start_date, end_date, cache_dir=CACHE_DIR):
+    """Download daily bars for a symbol, going through an on-disk parquet cache"""
+    cache_path = _cache_path(symbol, start_date, end_date, cache_dir)
+    if os.path.exists(cache_path):
+        return pd.read_parquet(cache_path, engine='pyarrow')
+    
+    import yfinance as yf  # slow to import and only needed on a cache miss
+    data = yf.download(
+        symbol,
+        start=start_date,
+        end=end_date,
+        progress=False
+    )
+    if data.empty:
+        return data
+    
+    # Flatten multi-index columns if present
+    if isinstance(data.columns, pd.MultiIndex):
+        data.columns = data.columns.get_level_values(0)
+    
+    _write_cache(data, cache_path, symbol)
+    return data
+
+
+def fetch_histories(symbols, start_date, end_date, cache_dir=CACHE_DIR):
+    """Download daily bars for several symbols in one batched yfinance request
+    
+    Symbols already in the parquet cache are read from disk; the rest are
+    fetched together. Returns {symbol: DataFrame} for symbols that have data.
+    """
+    frames = {}
+    missing = []
+    for symbol in symbols:
+        cache_path = _cache_path(symbol, start_date, end_date, cache_dir)
+        if os.path.exists(cache_path):
+            frames[symbol] = pd.read_parquet(cache_path, engine='pyarrow')
+        else:
+            missing.append(symbol)
+            
+    if not missing:
+        return frames
+        
+    import yfinance as yf
+    data = yf.download(
+        ' '.join(missing),
+        start=start_date,
+        end=end_date,
+        group_by='ticker',
+        threads=True,
+        progress=False
+    )
+    if data.empty:
+        return frames
+        
+    tickers = set(data.columns.get_level_values(0))
+    for symbol in missing:
+        if symbol not in tickers:
+            continue
+        # Dates are the union over all tickers - drop the ones this symbol lacks
+        frame = data[symbol].dropna(how='all')
+        if frame.empty:
+            continue
+        frames[symbol] = frame
+        _write_cache(frame, _cache_path(symbol, start_date, end_date, cache_dir), symbol)
+        
+    return frames
+
+
+class _PandasRowFeed(bt.feeds.PandasDirectData):
+    """PandasDirectData that can be pickled into an optstrategy worker pool
+    
+    The itertuples() row iterator is only used while loading and start()
+    creates a new one, so it is left out of the pickled state.
+    """
+    
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state.pop('_rows', None)
+        return state
+
+
+def make_feed(data, name=None):
+    """Wrap an OHLCV DataFrame in a (picklable) PandasDirectData feed
+    
+    PandasDirectData iterates itertuples() and reads each field by position,
+    so the frame must have a DatetimeIndex followed by exactly FEED_COLUMNS in
+    order. Column names are matched case-insensitively and a zero
+    openinterest column is added when missing.
+    """
+    frame = data.rename(columns=str.lower)
+    if 'openinterest' not in frame.columns:
+        frame['openinterest'] = 0.0
+    return _PandasRowFeed(dataname=frame[FEED_COLUMNS], name=name)
+
 
 class DataHandler:
-    """Handle data downloading and preparation"""
+    """Handle data downloading and preparation
+    
+    Each entry in self.data is a yfinance-style DataFrame: DatetimeIndex plus
+    Open/High/Low/Close/Volume columns. Feeds are built with make_feed().
+    """
     
     def __init__(self, symbols, start_date, end_date):
         self.symbols = symbols if isinstance(symbols, list) else [symbols]
@@ -18,24 +138,21 @@ class DataHandler:
         
     def download_data(self, symbol):
         """Download data for a single symbol"""
+        data = self._fetch(symbol)
+        if data is not None:
+            self.data[symbol] = data
+        return data
+        
+    def _fetch(self, symbol):
+        """Fetch one symbol without touching self.data (safe to call from threads)"""
         print(f"Downloading data for {symbol}...")
         try:
-            data = yf.download(
-                symbol,
-                start=self.start_date,
-                end=self.end_date,
-                progress=False
-            )
+            data = fetch_history(symbol, self.start_date, self.end_date)
             
             if data.empty:
                 print(f"Warning: No data downloaded for {symbol}")
                 return None
                 
-            # Flatten multi-index columns if present
-            if isinstance(data.columns, pd.MultiIndex):
-                data.columns = data.columns.get_level_values(0)
-                
-            self.data[symbol] = data
             print(f"Downloaded {len(data)} bars for {symbol}")
             return data
             
@@ -44,9 +161,45 @@ class DataHandler:
             return None
             
     def download_all(self):
-        """Download data for all symbols"""
-        for symbol in self.symbols:
-            self.download_data(symbol)
+        """Download data for all symbols concurrently"""
+        # Downloads are network bound - overlap them in threads, merge results here
+        workers = min(len(self.symbols), 8) or 1
+        with ThreadPoolExecutor(max_workers=workers) as ex:
+            frames = list(ex.map(self._fetch, self.symbols))
+        return self._store(frames)
+        
+    def download_multi(self, symbols=None):
+        """Download several symbols with a single batched request"""
+        symbols = self.symbols if symbols is None else symbols
+        print(f"Downloading data for {', '.join(symbols)}...")
+        try:
+            frames = fetch_histories(symbols, self.start_date, self.end_date)
+        except Exception as e:
+            print(f"Error downloading {', '.join(symbols)}: {e}")
+            return self.data
+            
+        for symbol in symbols:
+            if symbol in frames:
+                self.data[symbol] = frames[symbol]
+                print(f"Downloaded {len(frames[symbol])} bars for {symbol}")
+            else:
+                print(f"Warning: No data downloaded for {symbol}")
+        return self.data
+        
+    async def download_all_async(self):
+        """Download data for all symbols from inside a running event loop"""
+        # yfinance is blocking (and handles Yahoo's cookie/crumb auth), so each
+        # fetch runs in a worker thread and the event loop only gathers them
+        frames = await asyncio.gather(
+            *[asyncio.to_thread(self._fetch, symbol) for symbol in self.symbols]
+        )
+        return self._store(frames)
+        
+    def _store(self, frames):
+        """Merge fetched frames into self.data in symbol order"""
+        for symbol, data in zip(self.symbols, frames):
+            if data is not None:
+                self.data[symbol] = data
         return self.data
         
     def get_backtrader_feed(self, symbol):
@@ -54,10 +207,7 @@ class DataHandler:
         if symbol not in self.data or self.data[symbol] is None:
             return None
             
-        return bt.feeds.PandasData(
-            dataname=self.data[symbol],
-            name=symbol
-        )
+        return make_feed(self.data[symbol], name=symbol)
         
     def get_all_feeds(self):
         """Get backtrader feeds for all symbols"""
@@ -87,3 +237,14 @@ class DataHandler:
         except Exception as e:
             print(f"Error loading {symbol}: {e}")
             return None
+
+
+@lru_cache(maxsize=32)
+def get_handler(symbols, start_date, end_date):
+    """Downloaded DataHandler shared by every caller asking for the same data
+    
+    symbols must be a tuple so the arguments can key the cache.
+    """
+    handler = DataHandler(list(symbols), start_date, end_date)
+    handler.download_all()
+    return handler
@@ -3,15 +3,15 @@ Demo script to automatically run backtests
 """
 import backtrader as bt
 from data_handler import DataHandler
-from backtest_engine import BacktestEngine
+from backtest_engine import BacktestEngine, run_backtests
 from benchmarks import BenchmarkComparator
+from report_generator import open_in_browser
+from indicators import IndicatorSet
 from strategies import (
     SMACrossover, RSIStrategy, MACDStrategy, 
     BollingerBandsStrategy, MultiStrategyPortfolio
 )
 from config import *
-import warnings
-warnings.filterwarnings('ignore')
 
 
 def demo_single_strategy():
@@ -76,6 +76,8 @@ def demo_strategy_comparison():
     
     # Download data once
     print("\n[1/3] Downloading AAPL data...")
+    handler = DataHandler("AAPL", "2020-01-01", "2024-12-31")
+    data_df = handler.download_data("AAPL")
     
     strategies = [
         (SMACrossover, "SMA Crossover (20/50)", {'fast': 20, 'slow': 50}),
@@ -85,51 +87,33 @@ def demo_strategy_comparison():
         (MultiStrategyPortfolio, "Multi-Strategy Combo", {'fast_sma': 20, 'slow_sma': 50})
     ]
     
-    results_list = []
-    strategy_names = []
+    strategy_names = [name for _, name, _ in strategies]
     
-    print(f"[2/3] Running {len(strategies)} strategies...\n")
+    # Indicators are computed once and shared; each strategy only reads its signal array
+    indicators = IndicatorSet(data_df['Close'].to_numpy())
+    for strategy_class, _, params in strategies:
+        params['precomputed_signals'] = strategy_class.precompute_signals(indicators, **params)
     
-    for i, (strategy_class, name, params) in enumerate(strategies, 1):
-        print(f"  [{i}/{len(strategies)}] Testing {name}...")
-        
-        # Create new engine for each strategy
-        engine = BacktestEngine(initial_cash=100000, commission=0.001)
-        engine.setup_cerebro()
-        
-        # Download fresh data
-        handler = DataHandler("AAPL", "2020-01-01", "2024-12-31")
-        handler.download_data("AAPL")
-        feed = handler.get_backtrader_feed("AAPL")
-        engine.add_data(feed, name="AAPL")
-        
-        # Add strategy
-        engine.add_strategy(
-            strategy_class,
-            printlog=False,
-            stop_loss=0.05,
-            take_profit=0.15,
-            max_position_size=0.2,
-            **params
-        )
-        
-        # Run
-        result = engine.run(plot=False)
-        results_list.append(result)
-        strategy_names.append(name)
+    print(f"[2/3] Running {len(strategies)} strategies in parallel...\n")
+    
+    # Backtests are independent - run each in its own process while the
+    # benchmarks download here
+    risk = {'printlog': False, 'stop_loss': 0.05, 'take_profit': 0.15, 'max_position_size': 0.2}
+    benchmark = BenchmarkComparator("2020-01-01", "2024-12-31", initial_capital=100000)
+    metrics_list = run_backtests(
+        [(cls, {"AAPL": data_df}, {**risk, **params}) for cls, _, params in strategies],
+        initial_cash=100000,
+        commission=0.001,
+        while_running=benchmark.download_benchmarks
+    )
     
     # Compare results
     print("\n[3/3] Generating comparison report...\n")
     
-    # Download and add benchmarks
-    print("Adding benchmark comparisons...")
-    benchmark = BenchmarkComparator("2020-01-01", "2024-12-31", initial_capital=100000)
-    benchmark.download_benchmarks()
-    
     # Get initial comparison
     engine_temp = BacktestEngine(100000, 0.001)
-    strategy_df = engine_temp.compare_strategies(
-        results_list, 
+    strategy_df = engine_temp.compare_metrics(
+        metrics_list, 
         strategy_names,
         generate_html=False,
         open_browser=False
@@ -146,23 +130,48 @@ def demo_strategy_comparison():
     print("="*120 + "\n")
     
     # Generate HTML report with benchmarks
-    engine_temp.report_generator.generate_comparison_report(
+    report_file = engine_temp.report_generator.generate_comparison_report(
         combined_df,
         title="Strategy Comparison with Benchmarks"
     )
-    
-    import webbrowser
-    import os
-    from datetime import datetime
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    report_file = f"reports/comparison_{timestamp}.html"
-    abs_path = os.path.abspath(report_file)
-    webbrowser.open('file://' + abs_path)
+    open_in_browser(report_file)
     print(f"Opening comparison report in browser...")
     
     return combined_df
 
 
+def demo_vectorized_comparison():
+    """Demo: Fast vectorized comparison of all strategies (vectorbt)"""
+    from vector_backtest import run_vectorized_comparison
+    
+    print("\n" + "="*70)
+    print("DEMO: VECTORIZED STRATEGY COMPARISON (All Strategies on AAPL)")
+    print("="*70)
+    
+    print("\n[1/2] Downloading AAPL data...")
+    handler = DataHandler("AAPL", "2020-01-01", "2024-12-31")
+    data = handler.download_data("AAPL")
+    
+    print("[2/2] Simulating all strategies in one vectorized portfolio...\n")
+    df = run_vectorized_comparison(
+        data['Close'],
+        initial_cash=100000,
+        commission=0.001,
+        stop_loss=0.05,
+        take_profit=0.15,
+        max_position_size=0.2
+    )
+    
+    print("="*100)
+    print("VECTORIZED STRATEGY COMPARISON")
+    print("="*100)
+    print(df.to_string(index=False))
+    print("="*100 + "\n")
+    print("NOTE: Fills happen on the signal bar; run 'compare' for the Backtrader reference.")
+    
+    return df
+
+
 def demo_quick_test():
     """Quick demo with just one strategy"""
     print("\n" + "="*70)
@@ -202,17 +211,20 @@ if __name__ == "__main__":
     print("#" + " "*15 + "ALGORITHMIC TRADING DEMO SYSTEM" + " "*23 + "#")
     print("#"*70)
     
+    modes = {
+        "quick": demo_quick_test,
+        "single": demo_single_strategy,
+        "compare": demo_strategy_comparison,
+        "fast": demo_vectorized_comparison,
+    }
+    
     if len(sys.argv) > 1:
         mode = sys.argv[1]
-        if mode == "quick":
-            demo_quick_test()
-        elif mode == "single":
-            demo_single_strategy()
-        elif mode == "compare":
-            demo_strategy_comparison()
+        if mode in modes:
+            modes[mode]()
         else:
             print(f"\nUnknown mode: {mode}")
-            print("Usage: python demo.py [quick|single|compare]")
+            print(f"Usage: python demo.py [{'|'.join(modes)}]")
     else:
         # Default: run quick demo
         demo_quick_test()
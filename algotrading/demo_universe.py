@@ -1,14 +1,14 @@
 """
 Demo for universe trading (SPY, QQQ, IWM) with 200-day MA filter
 """
+import sys
 from data_handler import DataHandler
-from backtest_engine import BacktestEngine
+from backtest_engine import BacktestEngine, run_backtests
 from benchmarks import BenchmarkComparator
+from report_generator import open_in_browser
 from universe_strategy import UniverseRotationStrategy, SimpleMAFilterStrategy
 from momentum_strategy import MomentumRotationStrategy, DualMomentumStrategy, BuyAndHoldUniverse
 from strategies import SMACrossover, MultiStrategyPortfolio
-import warnings
-warnings.filterwarnings('ignore')
 
 
 def demo_universe_trading():
@@ -104,48 +104,31 @@ def demo_universe_comparison():
         }),
     ]
     
-    results_list = []
-    strategy_names = []
+    strategy_names = [name for _, name, _ in strategies]
     
     print("\n[1/3] Downloading universe data...")
     
-    for i, (strategy_class, name, params) in enumerate(strategies, 1):
-        print(f"\n[2/3] Running strategy {i}/{len(strategies)}: {name}...")
-        
-        # Download data
-        handler = DataHandler(universe, start_date, end_date)
-        handler.download_all()
-        
-        # Setup engine
-        engine = BacktestEngine(initial_cash=100000, commission=0.001)
-        engine.setup_cerebro()
-        
-        # Add all feeds
-        feeds = handler.get_all_feeds()
-        for symbol, feed in feeds.items():
-            engine.add_data(feed, name=symbol)
-        
-        # Add strategy
-        engine.add_strategy(
-            strategy_class,
-            printlog=False,
-            **params
-        )
-        
-        # Run
-        result = engine.run(plot=False)
-        results_list.append(result)
-        strategy_names.append(name)
-    
-    # Download benchmarks
-    print("\n[3/3] Adding benchmark comparisons...")
+    # Download once - every strategy runs on the same DataFrames
+    handler = DataHandler(universe, start_date, end_date)
+    data = handler.download_all()
+    
+    # Backtests are independent - run each in its own process while the
+    # benchmarks download here
+    print(f"\n[2/3] Running {len(strategies)} strategies in parallel...")
     benchmark = BenchmarkComparator(start_date, end_date, initial_capital=100000)
-    benchmark.download_benchmarks()
+    metrics_list = run_backtests(
+        [(cls, data, {'printlog': False, **params}) for cls, _, params in strategies],
+        initial_cash=100000,
+        commission=0.001,
+        while_running=benchmark.download_benchmarks
+    )
+    
+    print("\n[3/3] Adding benchmark comparisons...")
     
     # Get strategy comparison
     engine_temp = BacktestEngine(100000, 0.001)
-    strategy_df = engine_temp.compare_strategies(
-        results_list,
+    strategy_df = engine_temp.compare_metrics(
+        metrics_list,
         strategy_names,
         generate_html=False,
         open_browser=False
@@ -158,30 +141,21 @@ def demo_universe_comparison():
     print("\n" + "="*120)
     print("UNIVERSE STRATEGY COMPARISON (including benchmarks)")
     print("="*120)
-    print(combined_df.to_string(index=False))
+    combined_df.to_csv(sys.stdout, sep='\t', index=False, float_format='%.4f')
     print("="*120 + "\n")
     
     # Generate HTML report
-    engine_temp.report_generator.generate_comparison_report(
+    report_file = engine_temp.report_generator.generate_comparison_report(
         combined_df,
         title="Universe Trading Comparison (SPY+QQQ+IWM)"
     )
-    
-    import webbrowser
-    import os
-    from datetime import datetime
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    report_file = f"reports/comparison_{timestamp}.html"
-    abs_path = os.path.abspath(report_file)
-    webbrowser.open('file://' + abs_path)
+    open_in_browser(report_file)
     print(f"Opening comparison report in browser...")
     
     return combined_df
 
 
 if __name__ == "__main__":
-    import sys
-    
     print("\n" + "#"*70)
     print("#" + " "*15 + "UNIVERSE TRADING SYSTEM" + " "*30 + "#")
     print("#"*70)
@@ -195,10 +169,11 @@ if __name__ == "__main__":
     else:
         choice = input("\nEnter choice (1-2): ").strip()
     
-    if choice == "1":
-        demo_universe_trading()
-    elif choice == "2":
-        demo_universe_comparison()
-    else:
+    modes = {
+        "1": demo_universe_trading,
+        "2": demo_universe_comparison,
+    }
+    
+    if choice not in modes:
         print("Invalid choice. Running universe comparison by default.")
-        demo_universe_comparison()
+    modes.get(choice, demo_universe_comparison)()
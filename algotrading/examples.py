@@ -1,10 +1,13 @@
 """
 Example usage and code snippets
 """
+import sys
 from data_handler import DataHandler
-from backtest_engine import BacktestEngine
-from strategies import SMACrossover, RSIStrategy, MultiStrategyPortfolio
+from backtest_engine import BacktestEngine, run_backtests
+from _njit import njit, prebuilt
+import indicators
 import backtrader as bt
+import numpy as np
 
 
 # ============================================================================
@@ -13,6 +16,7 @@ import backtrader as bt
 
 def example_simple_backtest():
     """Simplest possible backtest"""
+    from strategies import SMACrossover
     
     # Step 1: Get data
     handler = DataHandler("AAPL", "2020-01-01", "2024-12-31")
@@ -39,6 +43,7 @@ def example_simple_backtest():
 
 def example_custom_parameters():
     """Test strategy with different parameters"""
+    from strategies import RSIStrategy
     
     handler = DataHandler("MSFT", "2022-01-01", "2024-12-31")
     handler.download_data("MSFT")
@@ -68,40 +73,41 @@ def example_custom_parameters():
 
 def example_multiple_stocks():
     """Test same strategy on multiple stocks"""
+    from strategies import MultiStrategyPortfolio
     
     symbols = ["AAPL", "MSFT", "GOOGL", "TSLA"]
-    results = {}
     
-    for symbol in symbols:
-        print(f"\nTesting {symbol}...")
-        
-        handler = DataHandler(symbol, "2020-01-01", "2024-12-31")
-        handler.download_data(symbol)
-        
-        engine = BacktestEngine(initial_cash=100000, commission=0.001)
-        engine.setup_cerebro()
-        engine.add_data(handler.get_backtrader_feed(symbol), name=symbol)
-        engine.add_strategy(MultiStrategyPortfolio)
-        
-        engine.run()
-        metrics = engine.get_metrics()
-        
-        results[symbol] = {
+    # All four stocks in one batched download
+    handler = DataHandler(symbols, "2020-01-01", "2024-12-31")
+    handler.download_multi()
+    tested = [symbol for symbol in symbols if symbol in handler.data]
+    
+    # One independent backtest per stock, run in parallel processes
+    print(f"\nTesting {len(tested)} stocks...")
+    metrics_list = run_backtests(
+        [(MultiStrategyPortfolio, {symbol: handler.data[symbol]}, None) for symbol in tested]
+    )
+    
+    records = []
+    for symbol, metrics in zip(tested, metrics_list):
+        records.append({
+            'Symbol': symbol,
             'Return %': metrics['total_return_pct'],
             'Win Rate %': metrics['win_rate_pct'],
             'Sharpe': metrics['sharpe_ratio'],
             'Max DD %': metrics['max_drawdown_pct']
-        }
+        })
     
     # Print comparison
     import pandas as pd
-    df = pd.DataFrame(results).T
+    df = pd.DataFrame.from_records(records, index='Symbol')
+    df.index.name = None
     print("\n" + "="*70)
     print("MULTI-STOCK COMPARISON")
     print("="*70)
     print(df)
     
-    return results
+    return df
 
 
 # ============================================================================
@@ -110,6 +116,7 @@ def example_multiple_stocks():
 
 def example_parameter_optimization():
     """Test different parameter combinations"""
+    from vector_backtest import vectorized_sma_grid
     
     handler = DataHandler("AAPL", "2020-01-01", "2024-12-31")
     handler.download_data("AAPL")
@@ -118,41 +125,19 @@ def example_parameter_optimization():
     fast_periods = [10, 20, 30]
     slow_periods = [40, 50, 60]
     
-    results = []
-    
-    for fast in fast_periods:
-        for slow in slow_periods:
-            print(f"\nTesting SMA {fast}/{slow}...")
-            
-            engine = BacktestEngine(initial_cash=100000, commission=0.001)
-            engine.setup_cerebro()
-            
-            # Need fresh data for each run
-            handler_temp = DataHandler("AAPL", "2020-01-01", "2024-12-31")
-            handler_temp.download_data("AAPL")
-            engine.add_data(handler_temp.get_backtrader_feed("AAPL"))
-            
-            engine.add_strategy(SMACrossover, fast=fast, slow=slow, printlog=False)
-            engine.run()
-            metrics = engine.get_metrics()
-            
-            results.append({
-                'Fast': fast,
-                'Slow': slow,
-                'Return %': metrics['total_return_pct'],
-                'Sharpe': metrics['sharpe_ratio'],
-                'Max DD %': metrics['max_drawdown_pct']
-            })
+    # All combinations in one vectorized pass (no stops/targets - use
+    # BacktestEngine.run_param_grid for the exact Backtrader sweep)
+    print(f"\nTesting {len(fast_periods) * len(slow_periods)} SMA combinations...")
+    close = handler.data["AAPL"]['Close'].to_numpy()
+    df = vectorized_sma_grid(close, fast_periods, slow_periods)
     
     # Show best parameters
-    import pandas as pd
-    df = pd.DataFrame(results)
     df = df.sort_values('Return %', ascending=False)
     
     print("\n" + "="*70)
     print("PARAMETER OPTIMIZATION RESULTS (Sorted by Return)")
     print("="*70)
-    print(df.to_string(index=False))
+    df.to_csv(sys.stdout, sep='\t', index=False, float_format='%.4f')
     
     return df
 
@@ -161,8 +146,36 @@ def example_parameter_optimization():
 # EXAMPLE 5: Creating a Custom Strategy
 # ============================================================================
 
+@njit(cache=True)
+def _custom_strategy_loop(close, sma, rsi, volume, vol_sma, volume_factor, stop_loss, take_profit):
+    """Entry/exit flags for ExampleCustomStrategy, tracking the position per bar"""
+    n = close.size
+    entries = np.zeros(n, dtype=np.bool_)
+    exits = np.zeros(n, dtype=np.bool_)
+    in_position = False
+    buy_price = 0.0
+    for i in range(n):
+        if not in_position:
+            # Buy: Price above SMA, RSI not overbought, high volume
+            if close[i] > sma[i] and rsi[i] < 70 and volume[i] > vol_sma[i] * volume_factor:
+                entries[i] = True
+                in_position = True
+                buy_price = close[i]
+        else:
+            # Exit: stop loss, take profit or price below SMA
+            current_return = close[i] / buy_price - 1
+            if current_return <= -stop_loss or current_return >= take_profit or close[i] < sma[i]:
+                exits[i] = True
+                in_position = False
+    return entries, exits
+
+
 class ExampleCustomStrategy(bt.Strategy):
-    """Example of a custom strategy"""
+    """Example of a custom strategy
+    
+    The decision logic runs once over the preloaded arrays in
+    _custom_strategy_loop(); next() only reads the resulting flags.
+    """
     
     params = dict(
         sma_period=20,
@@ -173,9 +186,19 @@ class ExampleCustomStrategy(bt.Strategy):
     )
     
     def __init__(self):
-        self.sma = bt.ind.SMA(period=self.params.sma_period)
-        self.rsi = bt.ind.RSI(period=self.params.rsi_period)
-        self.volume_sma = bt.ind.SMA(self.data.volume, period=20)
+        close = np.frombuffer(self.data.close.array, dtype=np.float64)
+        volume = np.frombuffer(self.data.volume.array, dtype=np.float64)
+        sma, rsi = prebuilt(indicators.sma), prebuilt(indicators.rsi)
+        self._entries, self._exits = prebuilt(_custom_strategy_loop)(
+            close,
+            sma(close, self.params.sma_period),
+            rsi(close, self.params.rsi_period),
+            volume,
+            sma(volume, 20),
+            float(self.params.volume_factor),
+            float(self.params.stop_loss),
+            float(self.params.take_profit)
+        )
         self.order = None
         self.buy_price = None
     
@@ -183,33 +206,17 @@ class ExampleCustomStrategy(bt.Strategy):
         if self.order:
             return
         
-        # Volume confirmation
-        volume_ok = self.data.volume[0] > (self.volume_sma[0] * self.params.volume_factor)
+        i = len(self) - 1
         
         if not self.position:
-            # Buy: Price above SMA, RSI not overbought, high volume
-            if (self.data.close[0] > self.sma[0] and 
-                self.rsi[0] < 70 and 
-                volume_ok):
-                
+            if self._entries[i]:
                 cash = self.broker.getcash()
                 size = int((cash * 0.2) / self.data.close[0])  # 20% position
                 self.order = self.buy(size=size)
                 self.buy_price = self.data.close[0]
         
-        else:
-            # Exit conditions
-            current_return = (self.data.close[0] / self.buy_price - 1)
-            
-            # Stop loss
-            if current_return <= -self.params.stop_loss:
-                self.order = self.close()
-            # Take profit
-            elif current_return >= self.params.take_profit:
-                self.order = self.close()
-            # Technical exit: price below SMA
-            elif self.data.close[0] < self.sma[0]:
-                self.order = self.close()
+        elif self._exits[i]:
+            self.order = self.close()
 
 
 def example_custom_strategy():
@@ -235,8 +242,8 @@ def example_custom_strategy():
 
 def example_walk_forward():
     """Test strategy on rolling time windows"""
-    
     import pandas as pd
+    from strategies import MultiStrategyPortfolio
     
     periods = [
         ("2020-01-01", "2020-12-31", "2020"),
@@ -246,23 +253,22 @@ def example_walk_forward():
         ("2024-01-01", "2024-12-31", "2024"),
     ]
     
-    results = []
-    
+    # Downloads happen here; the per-period backtests run in parallel processes
+    windows = []
     for start, end, label in periods:
-        print(f"\nTesting {label}...")
-        
         handler = DataHandler("AAPL", start, end)
-        handler.download_data("AAPL")
-        
-        engine = BacktestEngine(initial_cash=100000, commission=0.001)
-        engine.setup_cerebro()
-        engine.add_data(handler.get_backtrader_feed("AAPL"))
-        engine.add_strategy(MultiStrategyPortfolio, printlog=False)
-        
-        engine.run()
-        metrics = engine.get_metrics()
-        
-        results.append({
+        data = handler.download_data("AAPL")
+        if data is not None:
+            windows.append((label, data))
+            
+    print(f"\nTesting {len(windows)} periods...")
+    metrics_list = run_backtests(
+        [(MultiStrategyPortfolio, {"AAPL": data}, {'printlog': False}) for _, data in windows]
+    )
+    
+    records = []
+    for (label, _), metrics in zip(windows, metrics_list):
+        records.append({
             'Period': label,
             'Return %': metrics['total_return_pct'],
             'Trades': metrics['total_trades'],
@@ -270,7 +276,7 @@ def example_walk_forward():
             'Sharpe': metrics['sharpe_ratio']
         })
     
-    df = pd.DataFrame(results)
+    df = pd.DataFrame.from_records(records)
     print("\n" + "="*70)
     print("WALK-FORWARD ANALYSIS")
     print("="*70)
@@ -285,8 +291,6 @@ def example_walk_forward():
 # ============================================================================
 
 if __name__ == "__main__":
-    import sys
-    
     examples = {
         "1": ("Simple Backtest", example_simple_backtest),
         "2": ("Custom Parameters", example_custom_parameters),
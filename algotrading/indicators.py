@@ -0,0 +1,193 @@
+"""
+NumPy/Numba indicator kernels
+
+Array versions of the backtrader indicators used by the strategies, following
+the same definitions (SMA-seeded exponential smoothing, Wilder RSI, population
+standard deviation, non-zero-difference crossover). Values are NaN until the
+indicator's warm-up period is complete.
+"""
+import numpy as np
+from _njit import njit, prange, prebuilt
+
+
+@njit(cache=True)
+def sma(arr, period):
+    """Simple moving average using a single running sum"""
+    n = arr.size
+    out = np.full(n, np.nan)
+    s = 0.0
+    for i in range(n):
+        s += arr[i]
+        if i >= period:
+            s -= arr[i - period]
+        if i >= period - 1:
+            out[i] = s / period
+    return out
+
+
+@njit(cache=True, parallel=True)
+def rolling_mean_2d(x, period):
+    """sma() of every row of a 2-D array, rows computed in parallel"""
+    out = np.empty_like(x)
+    for r in prange(x.shape[0]):
+        out[r] = sma(x[r], period)
+    return out
+
+
+@njit(cache=True)
+def _smooth(arr, period, alpha):
+    """Exponential smoothing seeded with the SMA of the first valid window"""
+    n = arr.size
+    out = np.full(n, np.nan)
+    start = 0
+    while start < n and np.isnan(arr[start]):
+        start += 1
+    seed = start + period - 1
+    if seed >= n:
+        return out
+        
+    s = 0.0
+    for i in range(start, seed + 1):
+        s += arr[i]
+    prev = s / period
+    out[seed] = prev
+    
+    alpha1 = 1.0 - alpha
+    for i in range(seed + 1, n):
+        prev = prev * alpha1 + arr[i] * alpha
+        out[i] = prev
+    return out
+
+
+@njit(cache=True)
+def ema(arr, period):
+    """Exponential moving average (alpha = 2 / (period + 1))"""
+    return _smooth(arr, period, 2.0 / (period + 1.0))
+
+
+@njit(cache=True)
+def smma(arr, period):
+    """Smoothed (Wilder) moving average (alpha = 1 / period)"""
+    return _smooth(arr, period, 1.0 / period)
+
+
+@njit(cache=True)
+def rsi(close, period):
+    """Relative Strength Index with Wilder smoothing"""
+    n = close.size
+    up = np.full(n, np.nan)
+    down = np.full(n, np.nan)
+    for i in range(1, n):
+        d = close[i] - close[i - 1]
+        up[i] = d if d > 0.0 else 0.0
+        down[i] = -d if d < 0.0 else 0.0
+    rs = smma(up, period) / smma(down, period)
+    return 100.0 - 100.0 / (1.0 + rs)
+
+
+@njit(cache=True)
+def macd(close, fast, slow, signal):
+    """MACD line and its signal line"""
+    line = ema(close, fast) - ema(close, slow)
+    return line, ema(line, signal)
+
+
+@njit(cache=True)
+def bbands(close, period, devfactor):
+    """Bollinger Bands (mid, top, bot) with population standard deviation"""
+    mid = sma(close, period)
+    var = sma(close * close, period) - mid * mid
+    std = np.sqrt(np.maximum(var, 0.0))
+    return mid, mid + devfactor * std, mid - devfactor * std
+
+
+@njit(cache=True)
+def crossover(a, b):
+    """+1 where a crosses above b, -1 where it crosses below, else 0"""
+    n = a.size
+    out = np.zeros(n)
+    last = np.nan  # last non-zero difference
+    for i in range(n):
+        d = a[i] - b[i]
+        if np.isnan(d):
+            continue
+        if last < 0.0 and d > 0.0:
+            out[i] = 1.0
+        elif last > 0.0 and d < 0.0:
+            out[i] = -1.0
+        if d != 0.0 or np.isnan(last):
+            last = d
+    return out
+
+
+@njit(cache=True)
+def sma_cross(close, fast, slow):
+    """sma(close, fast), sma(close, slow) and their crossover() in one pass"""
+    n = close.size
+    sma_fast = np.full(n, np.nan)
+    sma_slow = np.full(n, np.nan)
+    cross = np.zeros(n)
+    s_fast = 0.0
+    s_slow = 0.0
+    last = np.nan  # last non-zero difference
+    for i in range(n):
+        s_fast += close[i]
+        s_slow += close[i]
+        if i >= fast:
+            s_fast -= close[i - fast]
+        if i >= slow:
+            s_slow -= close[i - slow]
+        if i >= fast - 1:
+            sma_fast[i] = s_fast / fast
+        if i >= slow - 1:
+            sma_slow[i] = s_slow / slow
+            
+        d = sma_fast[i] - sma_slow[i]
+        if np.isnan(d):
+            continue
+        if last < 0.0 and d > 0.0:
+            cross[i] = 1.0
+        elif last > 0.0 and d < 0.0:
+            cross[i] = -1.0
+        if d != 0.0 or np.isnan(last):
+            last = d
+    return sma_fast, sma_slow, cross
+
+
+class IndicatorSet:
+    """Indicators for one close series, each computed once and shared"""
+    
+    def __init__(self, close):
+        self.close = np.ascontiguousarray(close, dtype=np.float64)
+        self._cache = {}
+        self._cumsum = None
+        
+    def _get(self, func, *args):
+        key = (func.__name__,) + args
+        if key not in self._cache:
+            self._cache[key] = prebuilt(func)(self.close, *args)
+        return self._cache[key]
+        
+    def sma(self, period):
+        """SMA as a slice difference of one prefix sum shared by every period"""
+        key = ('sma', period)
+        if key not in self._cache:
+            if self._cumsum is None:
+                self._cumsum = np.concatenate(([0.0], np.cumsum(self.close)))
+            cs = self._cumsum
+            out = np.full(self.close.size, np.nan)
+            out[period - 1:] = (cs[period:] - cs[:-period]) / period
+            self._cache[key] = out
+        return self._cache[key]
+        
+    def sma_cross(self, fast, slow):
+        return self._get(sma_cross, fast, slow)
+        
+    def rsi(self, period):
+        return self._get(rsi, period)
+        
+    def macd(self, fast, slow, signal):
+        return self._get(macd, fast, slow, signal)
+        
+    def bbands(self, period, devfactor):
+        return self._get(bbands, period, float(devfactor))
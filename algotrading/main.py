@@ -1,31 +1,21 @@
 """
 Main entry point for algorithmic trading backtesting system
 """
-import backtrader as bt
-from data_handler import DataHandler
-from backtest_engine import BacktestEngine
-from strategies import (
-    SMACrossover, RSIStrategy, MACDStrategy, 
-    BollingerBandsStrategy, MultiStrategyPortfolio
-)
+from data_handler import get_handler
+from backtest_engine import BacktestEngine, run_backtests
 from config import *
-import warnings
-warnings.filterwarnings('ignore')
 
 
 def run_single_strategy():
     """Run backtest on a single strategy"""
+    from strategies import MultiStrategyPortfolio
+    
     print("\n" + "="*60)
     print("SINGLE STRATEGY BACKTEST")
     print("="*60)
     
     # Download data
-    handler = DataHandler(
-        symbols=SYMBOLS[0],  # Just Apple for single strategy
-        start_date=DATA_START_DATE,
-        end_date=DATA_END_DATE
-    )
-    handler.download_data(SYMBOLS[0])
+    handler = get_handler((SYMBOLS[0],), DATA_START_DATE, DATA_END_DATE)  # Just Apple for single strategy
     
     # Setup backtest
     engine = BacktestEngine(
@@ -58,18 +48,17 @@ def run_single_strategy():
 
 def run_strategy_comparison():
     """Compare multiple strategies on the same data"""
+    from strategies import (
+        SMACrossover, RSIStrategy, MACDStrategy, 
+        BollingerBandsStrategy, MultiStrategyPortfolio
+    )
+    
     print("\n" + "="*60)
     print("STRATEGY COMPARISON BACKTEST")
     print("="*60)
     
     # Download data
-    handler = DataHandler(
-        symbols=SYMBOLS[0],
-        start_date=DATA_START_DATE,
-        end_date=DATA_END_DATE
-    )
-    handler.download_data(SYMBOLS[0])
-    feed_template = handler.get_backtrader_feed(SYMBOLS[0])
+    handler = get_handler((SYMBOLS[0],), DATA_START_DATE, DATA_END_DATE)
     
     strategies = [
         (SMACrossover, "SMA Crossover", {'fast': 20, 'slow': 50}),
@@ -79,47 +68,25 @@ def run_strategy_comparison():
         (MultiStrategyPortfolio, "Multi-Strategy", {'fast_sma': 20, 'slow_sma': 50})
     ]
     
-    results_list = []
-    strategy_names = []
-    
-    for strategy_class, name, params in strategies:
-        print(f"\nRunning {name}...")
-        
-        # Create new engine for each strategy
-        engine = BacktestEngine(
-            initial_cash=INITIAL_CAPITAL,
-            commission=COMMISSION
-        )
-        engine.setup_cerebro()
-        
-        # Add fresh data feed
-        handler_temp = DataHandler(
-            symbols=SYMBOLS[0],
-            start_date=DATA_START_DATE,
-            end_date=DATA_END_DATE
-        )
-        handler_temp.download_data(SYMBOLS[0])
-        feed = handler_temp.get_backtrader_feed(SYMBOLS[0])
-        engine.add_data(feed, name=SYMBOLS[0])
-        
-        # Add strategy with risk management
-        engine.add_strategy(
-            strategy_class,
-            printlog=False,
-            stop_loss=RISK_CONFIG['stop_loss_pct'],
-            take_profit=RISK_CONFIG['take_profit_pct'],
-            max_position_size=RISK_CONFIG['max_position_size'],
-            **params
-        )
-        
-        # Run
-        result = engine.run(plot=False)
-        results_list.append(result)
-        strategy_names.append(name)
+    strategy_names = [name for _, name, _ in strategies]
+    risk = {
+        'printlog': False,
+        'stop_loss': RISK_CONFIG['stop_loss_pct'],
+        'take_profit': RISK_CONFIG['take_profit_pct'],
+        'max_position_size': RISK_CONFIG['max_position_size']
+    }
+    
+    # Backtests are independent - run each in its own process
+    print(f"\nRunning {len(strategies)} strategies in parallel...")
+    metrics_list = run_backtests(
+        [(cls, handler.data, {**risk, **params}) for cls, _, params in strategies],
+        initial_cash=INITIAL_CAPITAL,
+        commission=COMMISSION
+    )
     
     # Compare results
-    comparison_df = BacktestEngine(INITIAL_CAPITAL, COMMISSION).compare_strategies(
-        results_list, 
+    comparison_df = BacktestEngine(INITIAL_CAPITAL, COMMISSION).compare_metrics(
+        metrics_list, 
         strategy_names
     )
     
@@ -128,17 +95,14 @@ def run_strategy_comparison():
 
 def run_portfolio_backtest():
     """Run backtest on multiple symbols"""
+    from strategies import MultiStrategyPortfolio
+    
     print("\n" + "="*60)
     print("MULTI-SYMBOL PORTFOLIO BACKTEST")
     print("="*60)
     
     # Download data for all symbols
-    handler = DataHandler(
-        symbols=SYMBOLS,
-        start_date=DATA_START_DATE,
-        end_date=DATA_END_DATE
-    )
-    handler.download_all()
+    handler = get_handler(tuple(SYMBOLS), DATA_START_DATE, DATA_END_DATE)
     
     # Setup backtest
     engine = BacktestEngine(
@@ -171,6 +135,18 @@ def run_portfolio_backtest():
     return engine, results
 
 
+def run_all():
+    """Run every backtest mode in turn"""
+    print("\n>>> Running Single Strategy Backtest...")
+    run_single_strategy()
+    
+    print("\n>>> Running Strategy Comparison...")
+    run_strategy_comparison()
+    
+    print("\n>>> Running Portfolio Backtest...")
+    run_portfolio_backtest()
+
+
 def main():
     """Main function to run backtests"""
     print("\n" + "#"*60)
@@ -186,24 +162,16 @@ def main():
     
     choice = input("\nEnter choice (1-4): ").strip()
     
-    if choice == "1":
-        run_single_strategy()
-    elif choice == "2":
-        run_strategy_comparison()
-    elif choice == "3":
-        run_portfolio_backtest()
-    elif choice == "4":
-        print("\n>>> Running Single Strategy Backtest...")
-        run_single_strategy()
-        
-        print("\n>>> Running Strategy Comparison...")
-        run_strategy_comparison()
-        
-        print("\n>>> Running Portfolio Backtest...")
-        run_portfolio_backtest()
-    else:
+    modes = {
+        "1": run_single_strategy,
+        "2": run_strategy_comparison,
+        "3": run_portfolio_backtest,
+        "4": run_all,
+    }
+    
+    if choice not in modes:
         print("Invalid choice. Running single strategy by default.")
-        run_single_strategy()
+    modes.get(choice, run_single_strategy)()
 
 
 if __name__ == "__main__":
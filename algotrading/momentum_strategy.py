@@ -1,8 +1,114 @@
 """
 Momentum rotation strategy - Hold the strongest performers, rotate monthly
 """
+from collections import deque
 import backtrader as bt
+import numpy as np
 from strategies import BaseStrategy
+from indicators import sma
+from _njit import njit, prebuilt
+
+
+@njit(cache=True)
+def _rebalance_kernel(close, mom, top_n, portfolio_value, pos_sizes, in_top, deltas):
+    """Top-N selection and order sizes for a momentum rebalance
+    
+    Assets with NaN momentum (not ready or filtered out) are not ranked. Fills
+    the caller's in_top with the boolean top-N mask and deltas with the
+    per-asset order size: -position for assets to close, the adjustment (or
+    new size) for top assets more than 10% off their equal-weight target, 0
+    otherwise.
+    """
+    n = mom.size
+    in_top[:] = False
+    deltas[:] = 0
+    held = 0
+    for _ in range(top_n):
+        best = -1
+        for i in range(n):
+            if in_top[i] or np.isnan(mom[i]):
+                continue
+            if best < 0 or mom[i] > mom[best]:
+                best = i
+        if best < 0:
+            break
+        in_top[best] = True
+        held += 1
+        
+    if held == 0:
+        for i in range(n):
+            deltas[i] = -pos_sizes[i]
+        return
+        
+    target_value = portfolio_value / held  # Equal weight
+    for i in range(n):
+        if not in_top[i]:
+            deltas[i] = -pos_sizes[i]
+            continue
+        current_value = pos_sizes[i] * close[i]
+        # Only rebalance if significantly off target (>10% difference)
+        if abs(current_value - target_value) / target_value > 0.10:
+            target_size = int(target_value / close[i])
+            if target_size > 0:
+                deltas[i] = target_size - pos_sizes[i]
+
+
+class FastROC(bt.Indicator):
+    """Rate of change over period bars, same values as bt.ind.ROC
+    
+    Computed directly on the data line - one subtraction and division per
+    bar - rather than through bt.ind.ROC's chain of delayed/arithmetic lines.
+    """
+    lines = ('roc',)
+    params = (('period', 12),)
+    
+    def __init__(self):
+        self.addminperiod(self.p.period + 1)
+        
+    def next(self):
+        old = self.data[-self.p.period]
+        self.lines.roc[0] = (self.data[0] - old) / old
+        
+    def once(self, start, end):
+        p = self.p.period
+        start = max(start, p)
+        src = np.frombuffer(self.data.array, dtype=np.float64)
+        dst = np.frombuffer(self.lines.roc.array, dtype=np.float64)
+        old = src[start - p:end - p]
+        dst[start:end] = (src[start:end] - old) / old
+
+
+class StreamingSMA(bt.Indicator):
+    """Simple moving average kept as a running sum
+    
+    Each bar adds the new value and subtracts the one leaving the window
+    instead of re-summing all period values like bt.ind.SMA.
+    """
+    lines = ('sma',)
+    params = (('period', 30),)
+    
+    def __init__(self):
+        self.addminperiod(self.p.period)
+        self._window = deque(maxlen=self.p.period)
+        self._sum = 0.0
+        
+    def _push(self, x):
+        if len(self._window) == self.p.period:
+            self._sum -= self._window[0]
+        self._window.append(x)
+        self._sum += x
+        
+    def prenext(self):
+        self._push(self.data[0])
+        
+    def next(self):
+        self._push(self.data[0])
+        self.lines.sma[0] = self._sum / self.p.period
+        
+    def once(self, start, end):
+        src = np.frombuffer(self.data.array, dtype=np.float64)
+        dst = np.frombuffer(self.lines.sma.array, dtype=np.float64)
+        dst[start:end] = prebuilt(sma)(src[:end], self.p.period)[start:end]
 
 
 class MomentumRotationStrategy(bt.Strategy):
@@ -30,14 +136,35 @@ class MomentumRotationStrategy(bt.Strategy):
         # Store indicators for each asset
         self.momentum = {}
         self.ma_200 = {}
+        self.above_ma = {}
         
         for d in self.datas:
             # Simple momentum = % change over lookback period
-            self.momentum[d] = bt.ind.ROC(d.close, period=self.params.lookback)
+            self.momentum[d] = FastROC(d.close, period=self.params.lookback)
             
             # 200-day MA filter
             if self.params.use_ma_filter:
-                self.ma_200[d] = bt.ind.SMA(d.close, period=self.params.ma_period)
+                self.ma_200[d] = StreamingSMA(d.close, period=self.params.ma_period)
+                # Filter evaluated as a line, once per bar inside backtrader
+                self.above_ma[d] = d.close >= self.ma_200[d]
+                
+        # Per-asset buffers reused by every rebalance
+        self._datas_list = list(self.datas)
+        n = len(self._datas_list)
+        self._mom_buf = np.empty(n)
+        self._close_buf = np.empty(n)
+        self._pos_buf = np.empty(n, dtype=np.int64)
+        self._top_buf = np.empty(n, dtype=bool)
+        self._delta_buf = np.empty(n, dtype=np.int64)
+        self._rebalance = prebuilt(_rebalance_kernel)
+        
+        # Parameters read in next(), hoisted out of backtrader's params lookup
+        self._rebalance_days = self.params.rebalance_days
+        self._min_len = self.params.lookback + 10
+        self._top_n = self.params.top_n
+        self._use_ma = self.params.use_ma_filter
+        self._ma_period = self.params.ma_period
+        self._printlog = self.params.printlog
     
     def prenext(self):
         """Called when not all indicators are ready"""
@@ -51,75 +178,61 @@ class MomentumRotationStrategy(bt.Strategy):
         if self.day_counter < self.rebalance_day:
             return
         
-        self.rebalance_day = self.day_counter + self.params.rebalance_days
+        self.rebalance_day = self.day_counter + self._rebalance_days
         
-        # Calculate momentum scores for all assets
-        rankings = []
-        for d in self.datas:
-            # Skip if not enough data
-            if len(d) < self.params.lookback + 10:
+        # Gather momentum, close and position for all assets in one pass
+        min_len, use_ma = self._min_len, self._use_ma
+        mom, close, pos_sizes = self._mom_buf, self._close_buf, self._pos_buf
+        for i, d in enumerate(self._datas_list):
+            pos_sizes[i] = self.getposition(d).size
+            close[i] = d.close[0]
+            # Skip if not enough data, or asset below its 200-MA
+            if len(d) < min_len or (use_ma and (len(d) < self._ma_period
+                                                or not self.above_ma[d][0])):
+                mom[i] = np.nan
                 continue
+            mom[i] = self.momentum[d][0]
             
-            # Apply 200-day MA filter
-            if self.params.use_ma_filter:
-                if len(d) < self.params.ma_period:
-                    continue
-                if d.close[0] < self.ma_200[d][0]:
-                    # Asset below 200-MA, give it negative score
-                    continue
-            
-            # Get momentum score
-            mom_score = self.momentum[d][0]
-            rankings.append((d, mom_score, d._name))
-        
-        # Sort by momentum (highest first)
-        rankings.sort(key=lambda x: x[1], reverse=True)
-        
-        # Determine which assets to hold
-        top_assets = set([d for d, score, name in rankings[:self.params.top_n]])
+        in_top, deltas = self._top_buf, self._delta_buf
+        self._rebalance(
+            close, mom, self._top_n, float(self.broker.getvalue()), pos_sizes, in_top, deltas
+        )
         
         # Log rotation
-        if self.params.printlog:
+        if self._printlog:
             self.log("=" * 60)
-            self.log(f"REBALANCE #{self.day_counter // self.params.rebalance_days}")
-            for rank, (d, score, name) in enumerate(rankings, 1):
-                status = "HOLD" if d in top_assets else "SKIP"
-                self.log(f"  {rank}. {name}: {score:.2f}% momentum - {status}")
+            self.log(f"REBALANCE #{self.day_counter // self._rebalance_days}")
+            eligible = np.flatnonzero(~np.isnan(mom))
+            ranked = eligible[np.argsort(-mom[eligible], kind='stable')]
+            for rank, i in enumerate(ranked, 1):
+                status = "HOLD" if in_top[i] else "SKIP"
+                self.log(f"  {rank}. {self._datas_list[i]._name}: {mom[i]:.2f}% momentum - {status}")
+        
+        # Same top N with every holding inside its band - no orders to place
+        if not deltas.any():
+            return
         
         # Close positions NOT in top N
-        for d in self.datas:
-            pos = self.getposition(d)
-            if pos and d not in top_assets:
-                self.close(data=d)
-                if self.params.printlog:
-                    self.log(f"SELL {d._name} @ {d.close[0]:.2f}")
+        for i in np.flatnonzero(~in_top & (pos_sizes != 0)):
+            d = self._datas_list[i]
+            self.close(data=d)
+            if self._printlog:
+                self.log(f"SELL {d._name} @ {close[i]:.2f}")
         
         # Open/maintain positions in top N
-        if len(top_assets) > 0:
-            target_pct = 1.0 / len(top_assets)  # Equal weight
-            
-            for d in top_assets:
-                pos = self.getposition(d)
-                current_value = pos.size * d.close[0] if pos else 0
-                target_value = self.broker.getvalue() * target_pct
-                
-                # Only rebalance if significantly off target (>10% difference)
-                if abs(current_value - target_value) / target_value > 0.10:
-                    target_size = int(target_value / d.close[0])
-                    
-                    if target_size > 0:
-                        if pos:
-                            # Adjust position
-                            delta = target_size - pos.size
-                            if delta > 0:
-                                self.buy(data=d, size=delta)
-                            elif delta < 0:
-                                self.sell(data=d, size=-delta)
-                        else:
-                            # Open new position
-                            self.buy(data=d, size=target_size)
-                            if self.params.printlog:
-                                self.log(f"BUY {d._name} @ {d.close[0]:.2f} (size: {target_size})")
+        for i in np.flatnonzero(in_top & (deltas != 0)):
+            d, delta = self._datas_list[i], int(deltas[i])
+            if pos_sizes[i]:
+                # Adjust position
+                if delta > 0:
+                    self.buy(data=d, size=delta)
+                else:
+                    self.sell(data=d, size=-delta)
+            else:
+                # Open new position
+                self.buy(data=d, size=delta)
+                if self._printlog:
+                    self.log(f"BUY {d._name} @ {close[i]:.2f} (size: {delta})")
     
     def log(self, txt, dt=None):
         """Logging function"""
@@ -149,7 +262,19 @@ class DualMomentumStrategy(bt.Strategy):
         self.momentum = {}
         
         for d in self.datas:
-            self.momentum[d] = bt.ind.ROC(d.close, period=self.params.lookback)
+            self.momentum[d] = FastROC(d.close, period=self.params.lookback)
+            
+        # Scores and top-N membership indexed by data position
+        self._datas_list = list(self.datas)
+        self._n = len(self._datas_list)
+        self._scores = np.full(self._n, -np.inf)
+        self._in_top = np.zeros(self._n, dtype=bool)
+        self._prev_top = np.zeros(self._n, dtype=bool)
+        
+        # Parameters read in next(), hoisted out of backtrader's params lookup
+        self._rebalance_days = self.params.rebalance_days
+        self._min_len = self.params.lookback + 10
+        self._top_n = self.params.top_n
     
     def prenext(self):
         self.next()
@@ -160,43 +285,51 @@ class DualMomentumStrategy(bt.Strategy):
         if self.day_counter < self.rebalance_day:
             return
         
-        self.rebalance_day = self.day_counter + self.params.rebalance_days
+        self.rebalance_day = self.day_counter + self._rebalance_days
         
-        # Get all assets with POSITIVE momentum
-        positive_momentum = []
-        for d in self.datas:
-            if len(d) < self.params.lookback + 10:
+        # Score assets with POSITIVE momentum, the rest stay at -inf
+        min_len = self._min_len
+        scores = self._scores
+        scores.fill(-np.inf)
+        for i, d in enumerate(self._datas_list):
+            if len(d) < min_len:
                 continue
             
             mom = self.momentum[d][0]
             if mom > 0:  # Only consider assets trending UP
-                positive_momentum.append((d, mom, d._name))
-        
-        # Sort by momentum
-        positive_momentum.sort(key=lambda x: x[1], reverse=True)
+                scores[i] = mom
         
-        # Hold top N with positive momentum
-        if len(positive_momentum) > 0:
-            top_assets = set([d for d, score, name in positive_momentum[:self.params.top_n]])
+        # Hold top N with positive momentum - none (cash) if nothing is trending up
+        positive = np.flatnonzero(scores > 0)
+        top_n = self._top_n
+        if len(positive) > top_n:
+            top_idx = positive[np.argpartition(-scores[positive], top_n - 1)[:top_n]]
         else:
-            top_assets = set()  # Go to cash if nothing is trending up
+            top_idx = positive
+        in_top = self._in_top
+        in_top.fill(False)
+        in_top[top_idx] = True
         
-        # Close positions not in top
-        for d in self.datas:
-            pos = self.getposition(d)
-            if pos and d not in top_assets:
-                self.close(data=d)
+        # Close positions not in top - with the same top as last rebalance
+        # everything outside it was already closed then
+        if not np.array_equal(in_top, self._prev_top):
+            has_pos = np.fromiter((self.getposition(d).size != 0 for d in self._datas_list),
+                                  dtype=bool, count=self._n)
+            for i in np.flatnonzero(has_pos & ~in_top):
+                self.close(data=self._datas_list[i])
+            self._prev_top[:] = in_top
         
         # Equal weight top assets
-        if len(top_assets) > 0:
-            target_pct = 1.0 / len(top_assets)
+        if len(top_idx) > 0:
+            # Portfolio value is the same for every asset - mark to market once
+            target_value = self.broker.getvalue() / len(top_idx)
             
-            for d in top_assets:
-                pos = self.getposition(d)
-                target_value = self.broker.getvalue() * target_pct
+            for i in top_idx:
+                d = self._datas_list[i]
                 target_size = int(target_value / d.close[0])
                 
                 if target_size > 0:
+                    pos = self.getposition(d)
                     if pos:
                         delta = target_size - pos.size
                         if abs(delta) > target_size * 0.1:  # Rebalance if >10% off
@@ -237,16 +370,16 @@ class BuyAndHoldUniverse(bt.Strategy):
         if n_assets == 0:
             return
         
-        target_pct = 1.0 / n_assets
+        target_value = self.broker.getvalue() / n_assets
         
         for d in self.datas:
-            target_value = self.broker.getvalue() * target_pct
-            target_size = int(target_value / d.close[0])
+            px = d.close[0]
+            target_size = int(target_value / px)
             
             if target_size > 0:
                 self.buy(data=d, size=target_size)
                 if self.params.printlog:
-                    self.log(f"BUY & HOLD {d._name} @ {d.close[0]:.2f} (size: {target_size})")
+                    self.log(f"BUY & HOLD {d._name} @ {px:.2f} (size: {target_size})")
         
         self.rebalanced = True
     
@@ -2,58 +2,43 @@
 HTML Report Generator for Backtest Results
 """
 import os
+import string
+from html import escape
+import threading
+import webbrowser
 from datetime import datetime
 import json
 
+# Columns read from a comparison DataFrame, in the order the row templates expect
+COMPARISON_COLUMNS = ['Strategy', 'Final Value', 'Return %', 'Total Trades',
+                      'Win Rate %', 'Profit Factor', 'Max DD %', 'Sharpe Ratio']
+
+
+def open_in_browser(report_file):
+    """Open a generated report in the browser without blocking the caller"""
+    # Not a daemon thread - a script that exits right away must still launch it
+    url = 'file://' + os.path.abspath(report_file)
+    threading.Thread(target=webbrowser.open, args=(url,)).start()
+
 
 class HTMLReportGenerator:
     """Generate beautiful HTML reports for backtest results"""
     
-    def __init__(self, output_dir="reports"):
-        self.output_dir = output_dir
-        os.makedirs(output_dir, exist_ok=True)
-        
-    def generate_report(self, metrics, strategy_name="Strategy", symbol="AAPL", 
-                       start_date=None, end_date=None, trades_data=None):
-        """Generate a comprehensive HTML report"""
-        
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"{self.output_dir}/{strategy_name.replace(' ', '_')}_{symbol}_{timestamp}.html"
-        
-        html = self._create_html(metrics, strategy_name, symbol, start_date, end_date, trades_data)
-        
-        with open(filename, 'w', encoding='utf-8') as f:
-            f.write(html)
-        
-        print(f"\nReport generated: {filename}")
-        return filename
-    
-    def generate_comparison_report(self, comparison_df, title="Strategy Comparison"):
-        """Generate comparison report for multiple strategies"""
-        
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"{self.output_dir}/comparison_{timestamp}.html"
-        
-        html = self._create_comparison_html(comparison_df, title)
-        
-        with open(filename, 'w', encoding='utf-8') as f:
-            f.write(html)
-        
-        print(f"\nComparison report generated: {filename}")
-        return filename
-    
-    def _create_html(self, metrics, strategy_name, symbol, start_date, end_date, trades_data):
-        """Create HTML content for single strategy report"""
-        
-        html = f"""
+    # Static page pieces, built once for every report
+    _HEAD = string.Template("""
 <!DOCTYPE html>
 <html lang="en">
 <head>
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Backtest Report - {strategy_name}</title>
+    <title>${title}</title>
     <style>
-        body {{
+${css}    </style>
+</head>
+<body>
+""")
+    
+    _CSS = """        body {
             font-family: 'Courier New', Courier, monospace;
             background: white;
             color: black;
@@ -61,177 +46,63 @@ class HTMLReportGenerator:
             max-width: 900px;
             margin: 0 auto;
             line-height: 1.6;
-        }}
+        }
         
-        h1 {{
+        h1 {
             border-bottom: 2px solid black;
             padding-bottom: 10px;
             margin-bottom: 20px;
-        }}
+        }
         
-        h2 {{
+        h2 {
             border-bottom: 1px solid black;
             padding-bottom: 5px;
             margin-top: 30px;
             margin-bottom: 15px;
-        }}
+        }
         
-        table {{
+        table {
             width: 100%;
             border-collapse: collapse;
             margin: 20px 0;
-        }}
+        }
         
-        th {{
+        th {
             text-align: left;
             border-bottom: 2px solid black;
             padding: 10px 5px;
-        }}
+        }
         
-        td {{
+        td {
             padding: 8px 5px;
             border-bottom: 1px solid #ccc;
-        }}
+        }
         
-        tr:last-child td {{
+        tr:last-child td {
             border-bottom: 2px solid black;
-        }}
+        }
         
-        .right {{
+        .right {
             text-align: right;
-        }}
+        }
         
-        .header-info {{
+        .header-info {
             margin-bottom: 30px;
-        }}
+        }
         
-        .header-info div {{
+        .header-info div {
             margin: 5px 0;
-        }}
+        }
         
-        .footer {{
+        .footer {
             margin-top: 40px;
             padding-top: 20px;
             border-top: 1px solid black;
             font-size: 0.9em;
-        }}
-    </style>
-</head>
-<body>
-    <h1>BACKTEST REPORT</h1>
-    
-    <div class="header-info">
-        <div>Strategy: {strategy_name}</div>
-        <div>Symbol: {symbol}</div>
-        <div>Period: {start_date or 'N/A'} to {end_date or 'N/A'}</div>
-        <div>Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</div>
-    </div>
-    
-    <h2>PORTFOLIO PERFORMANCE</h2>
-    <table>
-        <tr>
-            <th>Metric</th>
-            <th class="right">Value</th>
-        </tr>
-        <tr>
-            <td>Initial Capital</td>
-            <td class="right">${metrics['start_value']:,.2f}</td>
-        </tr>
-        <tr>
-            <td>Final Value</td>
-            <td class="right">${metrics['end_value']:,.2f}</td>
-        </tr>
-        <tr>
-            <td>Profit/Loss</td>
-            <td class="right">${metrics['end_value'] - metrics['start_value']:+,.2f}</td>
-        </tr>
-        <tr>
-            <td>Return</td>
-            <td class="right">{metrics['total_return_pct']:+.2f}%</td>
-        </tr>
-    </table>
-    
-    <h2>TRADE STATISTICS</h2>
-    <table>
-        <tr>
-            <th>Metric</th>
-            <th class="right">Value</th>
-        </tr>
-        <tr>
-            <td>Total Trades</td>
-            <td class="right">{metrics['total_trades']}</td>
-        </tr>
-        <tr>
-            <td>Winning Trades</td>
-            <td class="right">{metrics['winning_trades']}</td>
-        </tr>
-        <tr>
-            <td>Losing Trades</td>
-            <td class="right">{metrics['losing_trades']}</td>
-        </tr>
-        <tr>
-            <td>Win Rate</td>
-            <td class="right">{metrics['win_rate_pct']:.2f}%</td>
-        </tr>
-        <tr>
-            <td>Average Win</td>
-            <td class="right">${metrics['avg_win']:,.2f}</td>
-        </tr>
-        <tr>
-            <td>Average Loss</td>
-            <td class="right">${metrics['avg_loss']:,.2f}</td>
-        </tr>
-        <tr>
-            <td>Profit Factor</td>
-            <td class="right">{metrics['profit_factor']:.2f}</td>
-        </tr>
-    </table>
-    
-    <h2>RISK METRICS</h2>
-    <table>
-        <tr>
-            <th>Metric</th>
-            <th class="right">Value</th>
-        </tr>
-        <tr>
-            <td>Maximum Drawdown</td>
-            <td class="right">{metrics['max_drawdown_pct']:.2f}%</td>
-        </tr>
-        <tr>
-            <td>Sharpe Ratio</td>
-            <td class="right">{metrics['sharpe_ratio']:.2f}</td>
-        </tr>
-    </table>
-    
-    <div class="footer">
-        Generated by Algorithmic Trading System - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
-    </div>
-</body>
-</html>
+        }
 """
-        return html
     
-    def _create_comparison_html(self, comparison_df, title):
-        """Create HTML for strategy comparison"""
-        
-        # Convert DataFrame to dict for easier access
-        strategies = comparison_df.to_dict('records')
-        
-        # Separate strategies from benchmarks
-        algo_strategies = [s for s in strategies if s['Total Trades'] > 1]
-        benchmarks = [s for s in strategies if s['Total Trades'] <= 1]
-        
-        best_strategy = algo_strategies[0] if algo_strategies else strategies[0]
-        
-        html = f"""
-<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>{title}</title>
-    <style>
-        body {{
+    _COMPARISON_CSS = """        body {
             font-family: 'Courier New', Courier, monospace;
             background: white;
             color: black;
@@ -239,88 +110,232 @@ class HTMLReportGenerator:
             max-width: 1200px;
             margin: 0 auto;
             line-height: 1.6;
-        }}
+        }
         
-        h1 {{
+        h1 {
             border-bottom: 2px solid black;
             padding-bottom: 10px;
             margin-bottom: 30px;
-        }}
+        }
         
-        h2 {{
+        h2 {
             border-bottom: 1px solid black;
             padding-bottom: 5px;
             margin-top: 30px;
             margin-bottom: 15px;
-        }}
+        }
         
-        table {{
+        table {
             width: 100%;
             border-collapse: collapse;
             margin: 20px 0;
-        }}
+        }
         
-        th {{
+        th {
             text-align: left;
             border-bottom: 2px solid black;
             padding: 10px 5px;
-        }}
+        }
         
-        td {{
+        td {
             padding: 8px 5px;
             border-bottom: 1px solid #ccc;
-        }}
+        }
         
-        tr:last-child td {{
+        tr:last-child td {
             border-bottom: 2px solid black;
-        }}
+        }
         
-        .right {{
+        .right {
             text-align: right;
-        }}
+        }
         
-        .best {{
+        .best {
             background: #f0f0f0;
-        }}
+        }
         
-        .benchmark {{
+        .benchmark {
             background: #f9f9f9;
-        }}
+        }
         
-        .winner-box {{
+        .winner-box {
             border: 2px solid black;
             padding: 20px;
             margin: 20px 0 30px 0;
-        }}
+        }
         
-        .winner-box div {{
+        .winner-box div {
             margin: 5px 0;
-        }}
+        }
         
-        .info-box {{
+        .info-box {
             border: 1px solid black;
             padding: 15px;
             margin: 20px 0;
             background: #fafafa;
-        }}
+        }
         
-        .footer {{
+        .footer {
             margin-top: 40px;
             padding-top: 20px;
             border-top: 1px solid black;
             font-size: 0.9em;
-        }}
-    </style>
-</head>
-<body>
-    <h1>{title.upper()}</h1>
+        }
+"""
+    
+    _SECTION_FMT = """    <h2>{}</h2>
+    <table>
+        <tr>
+            <th>Metric</th>
+            <th class="right">Value</th>
+        </tr>
+""".format
+    _METRIC_ROW_FMT = """        <tr>
+            <td>{}</td>
+            <td class="right">{}</td>
+        </tr>
+""".format
+    _ALGO_ROW_FMT = """
+        <tr class="{}">
+            <td>{}</td>
+            <td>{}</td>
+            <td class="right">${:,.2f}</td>
+            <td class="right">{:+.2f}%</td>
+            <td class="right">{:.0f}</td>
+            <td class="right">{:.1f}%</td>
+            <td class="right">{:.2f}</td>
+            <td class="right">{:.2f}%</td>
+            <td class="right">{:.2f}</td>
+        </tr>
+""".format
+    _BENCH_ROW_FMT = """
+        <tr class="benchmark">
+            <td>{}</td>
+            <td class="right">${:,.2f}</td>
+            <td class="right">{:+.2f}%</td>
+            <td class="right">{}</td>
+        </tr>
+""".format
+    _RANK_ROW_FMT = """
+        <tr class="{}">
+            <td>{}</td>
+            <td>{}</td>
+            <td class="right">${:,.2f}</td>
+            <td class="right">{:+.2f}%</td>
+        </tr>
+""".format
+    
+    def __init__(self, output_dir="reports"):
+        self.output_dir = output_dir
+        os.makedirs(output_dir, exist_ok=True)
+        
+    def generate_report(self, metrics, strategy_name="Strategy", symbol="AAPL", 
+                       start_date=None, end_date=None, trades_data=None):
+        """Generate a comprehensive HTML report"""
+        
+        # One clock read for both the filename and the page, so they agree
+        now = datetime.now()
+        timestamp = now.strftime("%Y%m%d_%H%M%S")
+        generated = now.strftime('%Y-%m-%d %H:%M:%S')
+        filename = f"{self.output_dir}/{strategy_name.replace(' ', '_')}_{symbol}_{timestamp}.html"
+        
+        with open(filename, 'w', encoding='utf-8') as f:
+            self._write_html(f, metrics, strategy_name, symbol, start_date, end_date,
+                             trades_data, generated)
+        
+        print(f"\nReport generated: {filename}")
+        return filename
+    
+    def generate_comparison_report(self, comparison_df, title="Strategy Comparison"):
+        """Generate comparison report for multiple strategies"""
+        
+        now = datetime.now()
+        timestamp = now.strftime("%Y%m%d_%H%M%S")
+        generated = now.strftime('%Y-%m-%d %H:%M:%S')
+        filename = f"{self.output_dir}/comparison_{timestamp}.html"
+        
+        with open(filename, 'w', encoding='utf-8') as f:
+            self._write_comparison_html(f, comparison_df, title, generated)
+        
+        print(f"\nComparison report generated: {filename}")
+        return filename
+    
+    def _write_html(self, f, metrics, strategy_name, symbol, start_date, end_date, trades_data,
+                    generated):
+        """Write HTML for single strategy report to the open file f"""
+        
+        strategy_name, symbol = escape(strategy_name), escape(symbol)
+        f.write(self._HEAD.substitute(title=f"Backtest Report - {strategy_name}", css=self._CSS))
+        f.write(f"""    <h1>BACKTEST REPORT</h1>
+    
+    <div class="header-info">
+        <div>Strategy: {strategy_name}</div>
+        <div>Symbol: {symbol}</div>
+        <div>Period: {start_date or 'N/A'} to {end_date or 'N/A'}</div>
+        <div>Generated: {generated}</div>
+    </div>
+    
+""")
+        
+        sections = [
+            ("PORTFOLIO PERFORMANCE", [
+                ("Initial Capital", f"${metrics['start_value']:,.2f}"),
+                ("Final Value", f"${metrics['end_value']:,.2f}"),
+                ("Profit/Loss", f"${metrics['end_value'] - metrics['start_value']:+,.2f}"),
+                ("Return", f"{metrics['total_return_pct']:+.2f}%"),
+            ]),
+            ("TRADE STATISTICS", [
+                ("Total Trades", metrics['total_trades']),
+                ("Winning Trades", metrics['winning_trades']),
+                ("Losing Trades", metrics['losing_trades']),
+                ("Win Rate", f"{metrics['win_rate_pct']:.2f}%"),
+                ("Average Win", f"${metrics['avg_win']:,.2f}"),
+                ("Average Loss", f"${metrics['avg_loss']:,.2f}"),
+                ("Profit Factor", f"{metrics['profit_factor']:.2f}"),
+            ]),
+            ("RISK METRICS", [
+                ("Maximum Drawdown", f"{metrics['max_drawdown_pct']:.2f}%"),
+                ("Sharpe Ratio", f"{metrics['sharpe_ratio']:.2f}"),
+            ]),
+        ]
+        
+        for heading, rows in sections:
+            f.write(self._SECTION_FMT(heading))
+            f.writelines(self._METRIC_ROW_FMT(label, value) for label, value in rows)
+            f.write("    </table>\n    \n")
+        
+        f.write(f"""    <div class="footer">
+        Generated by Algorithmic Trading System - {generated}
+    </div>
+</body>
+</html>
+""")
+    
+    def _write_comparison_html(self, f, comparison_df, title, generated):
+        """Write HTML for strategy comparison to the open file f"""
+        
+        # Plain row tuples in COMPARISON_COLUMNS order, split into strategies
+        # and benchmarks in the same pass
+        strategies, algo_strategies, benchmarks = [], [], []
+        for row in comparison_df[COMPARISON_COLUMNS].itertuples(index=False, name=None):
+            row = (escape(row[0]),) + row[1:]
+            strategies.append(row)
+            (algo_strategies if row[3] > 1 else benchmarks).append(row)
+        
+        best_name, best_value, best_return, _, best_win_rate, _, _, best_sharpe = (
+            algo_strategies[0] if algo_strategies else strategies[0]
+        )
+        
+        title = escape(title)
+        f.write(self._HEAD.substitute(title=title, css=self._COMPARISON_CSS))
+        f.write(f"""    <h1>{title.upper()}</h1>
     
     <div class="winner-box">
-        <div><strong>TOP PERFORMING STRATEGY: {best_strategy['Strategy']}</strong></div>
-        <div>Final Value: ${best_strategy['Final Value']:,.2f}</div>
-        <div>Return: {best_strategy['Return %']:.2f}%</div>
-        <div>Win Rate: {best_strategy['Win Rate %']:.1f}%</div>
-        <div>Sharpe Ratio: {best_strategy['Sharpe Ratio']:.2f}</div>
+        <div><strong>TOP PERFORMING STRATEGY: {best_name}</strong></div>
+        <div>Final Value: ${best_value:,.2f}</div>
+        <div>Return: {best_return:.2f}%</div>
+        <div>Win Rate: {best_win_rate:.1f}%</div>
+        <div>Sharpe Ratio: {best_sharpe:.2f}</div>
     </div>
     
     <h2>ALGORITHMIC TRADING STRATEGIES</h2>
@@ -336,27 +351,13 @@ class HTMLReportGenerator:
             <th class="right">Max DD %</th>
             <th class="right">Sharpe</th>
         </tr>
-"""
+""")
         
         # Add algo strategy rows
         for i, strat in enumerate(algo_strategies, 1):
-            row_class = 'best' if i == 1 else ''
-            
-            html += f"""
-        <tr class="{row_class}">
-            <td>{i}</td>
-            <td>{strat['Strategy']}</td>
-            <td class="right">${strat['Final Value']:,.2f}</td>
-            <td class="right">{strat['Return %']:+.2f}%</td>
-            <td class="right">{strat['Total Trades']:.0f}</td>
-            <td class="right">{strat['Win Rate %']:.1f}%</td>
-            <td class="right">{strat['Profit Factor']:.2f}</td>
-            <td class="right">{strat['Max DD %']:.2f}%</td>
-            <td class="right">{strat['Sharpe Ratio']:.2f}</td>
-        </tr>
-"""
+            f.write(self._ALGO_ROW_FMT('best' if i == 1 else '', i, *strat))
         
-        html += """
+        f.write("""
     </table>
     
     <h2>BENCHMARK COMPARISON</h2>
@@ -372,22 +373,14 @@ class HTMLReportGenerator:
             <th class="right">Return %</th>
             <th class="right">Type</th>
         </tr>
-"""
+""")
         
         # Add benchmark rows
-        for bench in benchmarks:
-            bench_type = "Inflation Baseline" if "Inflation" in bench['Strategy'] else "S&P 500 Index"
-            
-            html += f"""
-        <tr class="benchmark">
-            <td>{bench['Strategy']}</td>
-            <td class="right">${bench['Final Value']:,.2f}</td>
-            <td class="right">{bench['Return %']:+.2f}%</td>
-            <td class="right">{bench_type}</td>
-        </tr>
-"""
+        for name, final_value, return_pct, *_ in benchmarks:
+            bench_type = "Inflation Baseline" if "Inflation" in name else "S&P 500 Index"
+            f.write(self._BENCH_ROW_FMT(name, final_value, return_pct, bench_type))
         
-        html += f"""
+        f.write("""
     </table>
     
     <h2>COMPLETE RANKING</h2>
@@ -398,31 +391,22 @@ class HTMLReportGenerator:
             <th class="right">Final Value</th>
             <th class="right">Return %</th>
         </tr>
-"""
+""")
         
         # Add all strategies ranked together
-        for i, strat in enumerate(strategies, 1):
-            is_benchmark = strat['Total Trades'] <= 1
+        for i, (name, final_value, return_pct, total_trades, *_) in enumerate(strategies, 1):
+            is_benchmark = total_trades <= 1
             row_class = 'benchmark' if is_benchmark else ('best' if i == 1 else '')
-            
-            html += f"""
-        <tr class="{row_class}">
-            <td>{i}</td>
-            <td>{strat['Strategy']}</td>
-            <td class="right">${strat['Final Value']:,.2f}</td>
-            <td class="right">{strat['Return %']:+.2f}%</td>
-        </tr>
-"""
+            f.write(self._RANK_ROW_FMT(row_class, i, name, final_value, return_pct))
         
-        html += f"""
+        f.write(f"""
     </table>
     
     <div class="footer">
-        Generated by Algorithmic Trading System - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
+        Generated by Algorithmic Trading System - {generated}
         <br>
-        Note: Benchmark Max DD and Sharpe Ratio require full historical data analysis and are not calculated here.
+        Note: Benchmark Sharpe Ratio requires full historical data analysis and is not calculated here.
     </div>
 </body>
 </html>
-"""
-        return html
+""")
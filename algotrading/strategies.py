@@ -1,8 +1,13 @@
 """
 Trading strategies for backtesting
 """
+import sys
+from collections import deque
+from itertools import product
 import backtrader as bt
 import numpy as np
+from indicators import crossover, IndicatorSet
+from _njit import prebuilt
 
 
 class BaseStrategy(bt.Strategy):
@@ -19,6 +24,24 @@ class BaseStrategy(bt.Strategy):
         self.order = None
         self.buy_price = None
         self.buy_comm = None
+        # Stop loss / take profit prices, set once per entry
+        self.sl_px = None
+        self.tp_px = None
+        # Parameters read per bar or per order, hoisted out of backtrader's
+        # params lookup; the exit factors are folded once here
+        self._printlog = self.params.printlog
+        self._max_position_size = self.params.max_position_size
+        self._sl_factor = 1.0 - self.params.stop_loss
+        self._tp_factor = 1.0 + self.params.take_profit
+        # Log lines are buffered and written in batches by flush_log()
+        self._log_buf = deque(maxlen=10000)
+        
+    @classmethod
+    def _resolve_params(cls, kwargs):
+        """Strategy defaults overridden by kwargs, for the vectorized runners"""
+        params = dict(cls.params._getkwargsdefault())
+        params.update(kwargs)
+        return params
         
     def notify_order(self, order):
         if order.status in [order.Submitted, order.Accepted]:
@@ -28,6 +51,8 @@ class BaseStrategy(bt.Strategy):
             if order.isbuy():
                 self.buy_price = order.executed.price
                 self.buy_comm = order.executed.comm
+                self.sl_px = self.buy_price * self._sl_factor
+                self.tp_px = self.buy_price * self._tp_factor
                 self.log(f'BUY EXECUTED, Price: {order.executed.price:.2f}, '
                         f'Cost: {order.executed.value:.2f}, Comm: {order.executed.comm:.2f}')
             else:
@@ -45,21 +70,92 @@ class BaseStrategy(bt.Strategy):
         self.log(f'TRADE PROFIT, GROSS: {trade.pnl:.2f}, NET: {trade.pnlcomm:.2f}')
         
     def log(self, txt, dt=None):
-        if self.params.printlog:
+        if self._printlog:
             dt = dt or self.datas[0].datetime.date(0)
-            print(f'{dt.isoformat()} {txt}')
+            self._log_buf.append(f'{dt.isoformat()} {txt}\n')
+            if len(self._log_buf) == self._log_buf.maxlen:
+                self.flush_log()
+                
+    def flush_log(self):
+        """Write the buffered log lines to stdout in one call"""
+        sys.stdout.writelines(self._log_buf)
+        self._log_buf.clear()
+        
+    def stop(self):
+        self.flush_log()
             
     def get_position_size(self):
         """Calculate position size based on portfolio value"""
-        cash = self.broker.getcash()
         value = self.broker.getvalue()
-        max_invest = value * self.params.max_position_size
+        max_invest = value * self._max_position_size
         price = self.data.close[0]
         size = int(max_invest / price)
         return size
 
 
-class SMACrossover(BaseStrategy):
+class SingleAssetStrategy(BaseStrategy):
+    """Base strategy trading one data feed from a per-bar signal
+    
+    Subclasses implement compute_signal() from their own indicator lines and
+    precompute_signals() for the whole series at once. Passing the latter's
+    array as precomputed_signals skips the indicators in a backtrader run,
+    and run_vectorized() simulates without backtrader at all.
+    """
+    
+    params = dict(
+        precomputed_signals=None  # per-bar +1 entry / -1 exit / 0 array from precompute_signals()
+    )
+    
+    def __init__(self):
+        super().__init__()
+        self.signals = self.params.precomputed_signals
+        
+    @classmethod
+    def precompute_signals(cls, indicators, **kwargs):
+        """Build this strategy's signal array from a shared indicators.IndicatorSet"""
+        raise NotImplementedError(f"{cls.__name__} does not implement precompute_signals()")
+        
+    def get_signal(self):
+        """Signal for the current bar: +1 entry, -1 exit, 0 nothing"""
+        if self.signals is not None:
+            return self.signals[len(self) - 1]
+        return self.compute_signal()
+        
+    def compute_signal(self):
+        """Signal for the current bar from the strategy's own indicator lines"""
+        raise NotImplementedError(f"{type(self).__name__} does not implement compute_signal()")
+        
+    @classmethod
+    def run_vectorized(cls, close, **kwargs):
+        """Trade log for a close array without backtrader's per-bar event loop
+        
+        Signals come from precompute_signals() and fills are simulated in one
+        pass by vector_backtest.simulate_trades, at the signal bar's close -
+        a fast approximation of the backtrader run, which fills on the next bar.
+        close may also be an IndicatorSet, to share indicators between runs.
+        """
+        from vector_backtest import simulate_trades
+        
+        indicators = close if isinstance(close, IndicatorSet) else IndicatorSet(close)
+        p = cls._resolve_params(kwargs)
+        signals = cls.precompute_signals(indicators, **kwargs)
+        return simulate_trades(indicators.close, signals, p['stop_loss'], p['take_profit'])
+        
+    @classmethod
+    def run_vectorized_grid(cls, close, param_grid):
+        """run_vectorized() for every combination of a parameter grid
+        
+        All runs share one IndicatorSet, so each indicator is computed once
+        for the whole sweep rather than once per combination. Returns a list
+        of (params, trades) tuples, like backtest_engine.run_grid.
+        """
+        indicators = IndicatorSet(close)
+        names = list(param_grid)
+        combos = [dict(zip(names, values)) for values in product(*param_grid.values())]
+        return [(params, cls.run_vectorized(indicators, **params)) for params in combos]
+
+
+class SMACrossover(SingleAssetStrategy):
     """Simple Moving Average Crossover Strategy"""
     
     params = dict(
@@ -73,34 +169,46 @@ class SMACrossover(BaseStrategy):
     
     def __init__(self):
         super().__init__()
-        self.sma_fast = bt.ind.SMA(period=self.params.fast)
-        self.sma_slow = bt.ind.SMA(period=self.params.slow)
-        self.crossover = bt.ind.CrossOver(self.sma_fast, self.sma_slow)
+        if self.signals is None:
+            self.sma_fast = bt.ind.SMA(period=self.params.fast)
+            self.sma_slow = bt.ind.SMA(period=self.params.slow)
+            self.crossover = bt.ind.CrossOver(self.sma_fast, self.sma_slow)
+            
+    @classmethod
+    def precompute_signals(cls, indicators, **kwargs):
+        p = cls._resolve_params(kwargs)
+        _, _, cross = indicators.sma_cross(p['fast'], p['slow'])
+        return cross.astype(np.int8)
+        
+    def compute_signal(self):
+        return self.crossover[0]
         
     def next(self):
         if self.order:
             return
             
+        signal = self.get_signal()
+        
         if not self.position:
             # Buy signal
-            if self.crossover > 0:
+            if signal > 0:
                 size = self.get_position_size()
                 self.order = self.buy(size=size)
         else:
             # Sell signals
-            if self.crossover < 0:
+            if signal < 0:
                 self.order = self.close()
             # Stop loss
-            elif self.buy_price and (self.data.close[0] / self.buy_price - 1) <= -self.params.stop_loss:
+            elif self.sl_px and self.data.close[0] <= self.sl_px:
                 self.log('STOP LOSS TRIGGERED')
                 self.order = self.close()
             # Take profit
-            elif self.buy_price and (self.data.close[0] / self.buy_price - 1) >= self.params.take_profit:
+            elif self.tp_px and self.data.close[0] >= self.tp_px:
                 self.log('TAKE PROFIT TRIGGERED')
                 self.order = self.close()
 
 
-class RSIStrategy(BaseStrategy):
+class RSIStrategy(SingleAssetStrategy):
     """RSI Mean Reversion Strategy"""
     
     params = dict(
@@ -115,30 +223,49 @@ class RSIStrategy(BaseStrategy):
     
     def __init__(self):
         super().__init__()
-        self.rsi = bt.ind.RSI(period=self.params.rsi_period)
+        if self.signals is None:
+            self.rsi = bt.ind.RSI(period=self.params.rsi_period)
+            self._oversold = self.params.oversold
+            self._overbought = self.params.overbought
+            
+    @classmethod
+    def precompute_signals(cls, indicators, **kwargs):
+        p = cls._resolve_params(kwargs)
+        rsi = indicators.rsi(p['rsi_period'])
+        return (rsi < p['oversold']).astype(np.int8) - (rsi > p['overbought'])
+        
+    def compute_signal(self):
+        rsi = self.rsi[0]
+        if rsi < self._oversold:
+            return 1
+        if rsi > self._overbought:
+            return -1
+        return 0
         
     def next(self):
         if self.order:
             return
             
+        signal = self.get_signal()
+        
         if not self.position:
             # Buy when oversold
-            if self.rsi < self.params.oversold:
+            if signal > 0:
                 size = self.get_position_size()
                 self.order = self.buy(size=size)
         else:
             # Sell when overbought or stop/take profit
-            if self.rsi > self.params.overbought:
+            if signal < 0:
                 self.order = self.close()
-            elif self.buy_price and (self.data.close[0] / self.buy_price - 1) <= -self.params.stop_loss:
+            elif self.sl_px and self.data.close[0] <= self.sl_px:
                 self.log('STOP LOSS TRIGGERED')
                 self.order = self.close()
-            elif self.buy_price and (self.data.close[0] / self.buy_price - 1) >= self.params.take_profit:
+            elif self.tp_px and self.data.close[0] >= self.tp_px:
                 self.log('TAKE PROFIT TRIGGERED')
                 self.order = self.close()
 
 
-class MACDStrategy(BaseStrategy):
+class MACDStrategy(SingleAssetStrategy):
     """MACD Strategy"""
     
     params = dict(
@@ -153,35 +280,47 @@ class MACDStrategy(BaseStrategy):
     
     def __init__(self):
         super().__init__()
-        self.macd = bt.ind.MACD(
-            period_me1=self.params.fast_ema,
-            period_me2=self.params.slow_ema,
-            period_signal=self.params.signal
-        )
-        self.crossover = bt.ind.CrossOver(self.macd.macd, self.macd.signal)
+        if self.signals is None:
+            self.macd = bt.ind.MACD(
+                period_me1=self.params.fast_ema,
+                period_me2=self.params.slow_ema,
+                period_signal=self.params.signal
+            )
+            self.crossover = bt.ind.CrossOver(self.macd.macd, self.macd.signal)
+            
+    @classmethod
+    def precompute_signals(cls, indicators, **kwargs):
+        p = cls._resolve_params(kwargs)
+        macd, signal = indicators.macd(p['fast_ema'], p['slow_ema'], p['signal'])
+        return prebuilt(crossover)(macd, signal).astype(np.int8)
+        
+    def compute_signal(self):
+        return self.crossover[0]
         
     def next(self):
         if self.order:
             return
             
+        signal = self.get_signal()
+        
         if not self.position:
             # Buy signal: MACD crosses above signal
-            if self.crossover > 0:
+            if signal > 0:
                 size = self.get_position_size()
                 self.order = self.buy(size=size)
         else:
             # Sell signal: MACD crosses below signal
-            if self.crossover < 0:
+            if signal < 0:
                 self.order = self.close()
-            elif self.buy_price and (self.data.close[0] / self.buy_price - 1) <= -self.params.stop_loss:
+            elif self.sl_px and self.data.close[0] <= self.sl_px:
                 self.log('STOP LOSS TRIGGERED')
                 self.order = self.close()
-            elif self.buy_price and (self.data.close[0] / self.buy_price - 1) >= self.params.take_profit:
+            elif self.tp_px and self.data.close[0] >= self.tp_px:
                 self.log('TAKE PROFIT TRIGGERED')
                 self.order = self.close()
 
 
-class BollingerBandsStrategy(BaseStrategy):
+class BollingerBandsStrategy(SingleAssetStrategy):
     """Bollinger Bands Mean Reversion Strategy"""
     
     params = dict(
@@ -195,33 +334,50 @@ class BollingerBandsStrategy(BaseStrategy):
     
     def __init__(self):
         super().__init__()
-        self.bbands = bt.ind.BollingerBands(
-            period=self.params.period,
-            devfactor=self.params.devfactor
-        )
+        if self.signals is None:
+            self.bbands = bt.ind.BollingerBands(
+                period=self.params.period,
+                devfactor=self.params.devfactor
+            )
+            
+    @classmethod
+    def precompute_signals(cls, indicators, **kwargs):
+        p = cls._resolve_params(kwargs)
+        _, top, bot = indicators.bbands(p['period'], p['devfactor'])
+        close = indicators.close
+        return (close < bot).astype(np.int8) - (close > top)
+        
+    def compute_signal(self):
+        if self.data.close[0] < self.bbands.lines.bot[0]:
+            return 1
+        if self.data.close[0] > self.bbands.lines.top[0]:
+            return -1
+        return 0
         
     def next(self):
         if self.order:
             return
             
+        signal = self.get_signal()
+        
         if not self.position:
             # Buy when price touches lower band
-            if self.data.close[0] < self.bbands.lines.bot[0]:
+            if signal > 0:
                 size = self.get_position_size()
                 self.order = self.buy(size=size)
         else:
             # Sell when price touches upper band or middle
-            if self.data.close[0] > self.bbands.lines.top[0]:
+            if signal < 0:
                 self.order = self.close()
-            elif self.buy_price and (self.data.close[0] / self.buy_price - 1) <= -self.params.stop_loss:
+            elif self.sl_px and self.data.close[0] <= self.sl_px:
                 self.log('STOP LOSS TRIGGERED')
                 self.order = self.close()
-            elif self.buy_price and (self.data.close[0] / self.buy_price - 1) >= self.params.take_profit:
+            elif self.tp_px and self.data.close[0] >= self.tp_px:
                 self.log('TAKE PROFIT TRIGGERED')
                 self.order = self.close()
 
 
-class MultiStrategyPortfolio(BaseStrategy):
+class MultiStrategyPortfolio(SingleAssetStrategy):
     """Portfolio strategy combining multiple signals"""
     
     params = dict(
@@ -238,50 +394,62 @@ class MultiStrategyPortfolio(BaseStrategy):
     
     def __init__(self):
         super().__init__()
-        # Indicators
-        self.sma_fast = bt.ind.SMA(period=self.params.fast_sma)
-        self.sma_slow = bt.ind.SMA(period=self.params.slow_sma)
-        self.rsi = bt.ind.RSI(period=self.params.rsi_period)
-        self.macd = bt.ind.MACD()
+        if self.signals is None:
+            # Indicators
+            self.sma_fast = bt.ind.SMA(period=self.params.fast_sma)
+            self.sma_slow = bt.ind.SMA(period=self.params.slow_sma)
+            self.rsi = bt.ind.RSI(period=self.params.rsi_period)
+            self.macd = bt.ind.MACD()
+            self._rsi_oversold = self.params.rsi_oversold
+            self._rsi_overbought = self.params.rsi_overbought
+            
+    @classmethod
+    def precompute_signals(cls, indicators, **kwargs):
+        p = cls._resolve_params(kwargs)
+        sma_fast = indicators.sma(p['fast_sma'])
+        sma_slow = indicators.sma(p['slow_sma'])
+        rsi = indicators.rsi(p['rsi_period'])
+        macd, signal = indicators.macd(12, 26, 9)
+        
+        sma_up = sma_fast > sma_slow
+        macd_up = macd > signal
+        bullish = sma_up.astype(np.int8) + (rsi < p['rsi_oversold']) + macd_up
+        bearish = (~sma_up).astype(np.int8) + (rsi > p['rsi_overbought']) + (~macd_up)
+        signals = (bullish >= 2).astype(np.int8) - (bearish >= 2)
+        
+        # No signals until every indicator has warmed up (backtrader's minperiod)
+        warm = ~(np.isnan(sma_fast) | np.isnan(sma_slow) | np.isnan(rsi) | np.isnan(signal))
+        signals[~warm] = 0
+        return signals
+        
+    def compute_signal(self):
+        # Count bullish/bearish votes with boolean arithmetic, as in
+        # precompute_signals - at most one side can reach 2 of 3
+        rsi = self.rsi[0]
+        sma_up = self.sma_fast[0] > self.sma_slow[0]
+        macd_up = self.macd.macd[0] > self.macd.signal[0]
+        bullish = sma_up + (rsi < self._rsi_oversold) + macd_up
+        bearish = (not sma_up) + (rsi > self._rsi_overbought) + (not macd_up)
+        return (bullish >= 2) - (bearish >= 2)
         
     def next(self):
         if self.order:
             return
             
-        # Count bullish signals
-        bullish_signals = 0
-        bearish_signals = 0
+        signal = self.get_signal()
         
-        # SMA signal
-        if self.sma_fast[0] > self.sma_slow[0]:
-            bullish_signals += 1
-        else:
-            bearish_signals += 1
-            
-        # RSI signal
-        if self.rsi[0] < self.params.rsi_oversold:
-            bullish_signals += 1
-        elif self.rsi[0] > self.params.rsi_overbought:
-            bearish_signals += 1
-            
-        # MACD signal
-        if self.macd.macd[0] > self.macd.signal[0]:
-            bullish_signals += 1
-        else:
-            bearish_signals += 1
-            
         if not self.position:
             # Buy if at least 2 bullish signals
-            if bullish_signals >= 2:
+            if signal > 0:
                 size = self.get_position_size()
                 self.order = self.buy(size=size)
         else:
             # Sell if at least 2 bearish signals
-            if bearish_signals >= 2:
+            if signal < 0:
                 self.order = self.close()
-            elif self.buy_price and (self.data.close[0] / self.buy_price - 1) <= -self.params.stop_loss:
+            elif self.sl_px and self.data.close[0] <= self.sl_px:
                 self.log('STOP LOSS TRIGGERED')
                 self.order = self.close()
-            elif self.buy_price and (self.data.close[0] / self.buy_price - 1) >= self.params.take_profit:
+            elif self.tp_px and self.data.close[0] >= self.tp_px:
                 self.log('TAKE PROFIT TRIGGERED')
                 self.order = self.close()
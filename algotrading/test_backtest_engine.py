@@ -0,0 +1,43 @@
+"""
+Tests for parameter sweeps over make_feed() data
+
+    cd algotrading && python -m unittest test_backtest_engine
+"""
+import unittest
+import numpy as np
+import pandas as pd
+from data_handler import make_feed
+from backtest_engine import BacktestEngine
+from strategies import SMACrossover
+
+
+def synthetic_ohlcv(n=400, seed=0):
+    """Random-walk OHLCV DataFrame in the yfinance layout"""
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0.0004, 0.018, n)))
+    return pd.DataFrame({
+        'Open': close,
+        'High': close * 1.01,
+        'Low': close * 0.99,
+        'Close': close,
+        'Volume': np.full(n, 1_000_000.0)
+    }, index=pd.bdate_range('2020-01-01', periods=n, name='Date'))
+
+
+class RunParamGridTest(unittest.TestCase):
+
+    def sweep(self, maxcpus):
+        engine = BacktestEngine(100000, 0.001)
+        engine.setup_cerebro()
+        engine.add_data(make_feed(synthetic_ohlcv(), name='TEST'), name='TEST')
+        runs = engine.run_param_grid(SMACrossover, {'fast': [10, 20], 'slow': [50]},
+                                     maxcpus=maxcpus)
+        return sorted((params['fast'], metrics['total_return_pct']) for params, metrics in runs)
+        
+    def test_multiprocess_sweep_matches_single_process(self):
+        # Worker pools pickle cerebro, feeds included
+        self.assertEqual(self.sweep(maxcpus=2), self.sweep(maxcpus=1))
+
+
+if __name__ == "__main__":
+    unittest.main()
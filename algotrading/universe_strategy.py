@@ -1,8 +1,33 @@
 """
 Multi-asset universe strategy with 200-day MA filter
 """
-import backtrader as bt
+import numpy as np
 from strategies import BaseStrategy
+from indicators import rolling_mean_2d, sma_cross
+from _njit import prebuilt
+
+
+def _stack_closes(datas):
+    """Preloaded closes of every data feed as rows of one array
+    
+    Feeds with fewer bars are NaN-padded at the end, so row i column t is
+    bar t of datas[i] - read it with t = len(d) - 1.
+    """
+    rows = [np.frombuffer(d.close.array, dtype=np.float64) for d in datas]
+    closes = np.full((len(rows), max(r.size for r in rows)), np.nan)
+    for i, row in enumerate(rows):
+        closes[i, :row.size] = row
+    return closes
+
+
+def _rotation_indicators(closes, ma_period, fast, slow):
+    """200-day MA and fast/slow SMA crossover rows for stacked closes"""
+    ma_200 = rolling_mean_2d(closes, ma_period)
+    
+    # Both SMAs and the cross computed in one pass per feed
+    cross = prebuilt(sma_cross)
+    crossover = np.vstack([cross(row, fast, slow)[2] for row in closes])
+    return ma_200, crossover
 
 
 class UniverseRotationStrategy(BaseStrategy):
@@ -21,25 +46,46 @@ class UniverseRotationStrategy(BaseStrategy):
     def __init__(self):
         super().__init__()
         
-        # Store indicators for each data feed
-        self.ma_200 = {}
-        self.sma_fast = {}
-        self.sma_slow = {}
-        self.crossover = {}
-        self.orders = {}
-        self.buy_prices = {}
+        # Indicators for every data feed computed up front over the preloaded
+        # closes, one row per feed, and read by bar index in next()
+        closes = _stack_closes(self.datas)
+        fast, slow = self.params.fast_sma, self.params.slow_sma
         
-        for i, d in enumerate(self.datas):
-            # 200-day MA filter
-            self.ma_200[d] = bt.ind.SMA(d.close, period=self.params.ma_period)
-            
-            # Fast and slow SMA for signals
-            self.sma_fast[d] = bt.ind.SMA(d.close, period=self.params.fast_sma)
-            self.sma_slow[d] = bt.ind.SMA(d.close, period=self.params.slow_sma)
-            self.crossover[d] = bt.ind.CrossOver(self.sma_fast[d], self.sma_slow[d])
-            
-            self.orders[d] = None
-            self.buy_prices[d] = None
+        # 200-day MA filter and fast/slow SMA crossover for signals
+        self.ma_200, self.crossover = _rotation_indicators(closes, self.params.ma_period, fast, slow)
+        
+        # Reciprocal closes, so sizing a buy is a multiply
+        self._inv_close = 1.0 / closes
+        
+        # No feed can have both signals before this many bars
+        self._warmup = max(self.params.ma_period, fast, slow)
+        
+        # Per-feed state indexed by data position; stop loss / take profit
+        # prices are set at each buy and NaN while flat
+        self.orders = [None] * len(self.datas)
+        self._order_to_idx = {}  # order.ref -> feed index, for notify_order
+        self._in_position = 0  # bit i set while feed i has an open position
+        self.sl_px = np.full(len(self.datas), np.nan)
+        self.tp_px = np.full(len(self.datas), np.nan)
+    
+    @classmethod
+    def simulate_vectorized(cls, closes, initial_cash=100000, commission=0.001, **kwargs):
+        """Trades for a (feed, bar) close array without backtrader's event loop
+        
+        The per-feed rules of next() run in one compiled loop in
+        vector_backtest.simulate_universe - a fast approximation of the
+        backtrader run. Returns (trades, final account value).
+        """
+        from vector_backtest import simulate_universe
+        
+        p = cls._resolve_params(kwargs)
+        closes = np.ascontiguousarray(closes, dtype=np.float64)
+        fast, slow = p['fast_sma'], p['slow_sma']
+        ma_200, crossover = _rotation_indicators(closes, p['ma_period'], fast, slow)
+        return simulate_universe(
+            closes, ma_200, crossover, p['stop_loss'], p['take_profit'], p['max_position_size'],
+            initial_cash, commission, warmup=max(p['ma_period'], fast, slow)
+        )
     
     def prenext(self):
         """Called when not all indicators are ready"""
@@ -47,23 +93,28 @@ class UniverseRotationStrategy(BaseStrategy):
     
     def next(self):
         """Trading logic"""
+        if len(self) < self._warmup:
+            return
+        
         for i, d in enumerate(self.datas):
             # Skip if we have pending order
-            if self.orders[d]:
+            if self.orders[i]:
                 continue
             
-            pos = self.getposition(d)
+            t = len(d) - 1
             
             # RULE: Only trade if price > 200-day MA
-            above_ma_200 = d.close[0] > self.ma_200[d][0]
+            above_ma_200 = d.close[0] > self.ma_200[i, t]
             
-            if not pos:
+            if not (self._in_position >> i) & 1:
                 # BUY signal: Crossover AND price above 200-day MA
-                if self.crossover[d] > 0 and above_ma_200:
-                    size = self.get_position_size_for_data(d)
+                if self.crossover[i, t] > 0 and above_ma_200:
+                    size = self.get_position_size_for_data(i, t)
                     if size > 0:
-                        self.orders[d] = self.buy(data=d, size=size)
-                        self.buy_prices[d] = d.close[0]
+                        self.orders[i] = self.buy(data=d, size=size)
+                        self._order_to_idx[self.orders[i].ref] = i
+                        self.sl_px[i] = d.close[0] * (1.0 - self.params.stop_loss)
+                        self.tp_px[i] = d.close[0] * (1.0 + self.params.take_profit)
                         self.log(f'BUY {d._name} @ {d.close[0]:.2f}')
             else:
                 # SELL signals
@@ -71,7 +122,7 @@ class UniverseRotationStrategy(BaseStrategy):
                 reason = ""
                 
                 # Sell if crossover down
-                if self.crossover[d] < 0:
+                if self.crossover[i, t] < 0:
                     sell = True
                     reason = "CROSSOVER DOWN"
                 
@@ -80,46 +131,55 @@ class UniverseRotationStrategy(BaseStrategy):
                     sell = True
                     reason = "BELOW 200-MA"
                 
-                # Stop loss
-                elif self.buy_prices[d] and (d.close[0] / self.buy_prices[d] - 1) <= -self.params.stop_loss:
+                # Stop loss (comparisons against NaN while flat are False)
+                elif d.close[0] <= self.sl_px[i]:
                     sell = True
                     reason = "STOP LOSS"
                 
                 # Take profit
-                elif self.buy_prices[d] and (d.close[0] / self.buy_prices[d] - 1) >= self.params.take_profit:
+                elif d.close[0] >= self.tp_px[i]:
                     sell = True
                     reason = "TAKE PROFIT"
                 
                 if sell:
-                    self.orders[d] = self.close(data=d)
+                    self.orders[i] = self.close(data=d)
+                    self._order_to_idx[self.orders[i].ref] = i
                     self.log(f'SELL {d._name} @ {d.close[0]:.2f} - {reason}')
-                    self.buy_prices[d] = None
+                    self.sl_px[i] = self.tp_px[i] = np.nan
     
     def notify_order(self, order):
         """Handle order notifications"""
         if order.status in [order.Submitted, order.Accepted]:
             return
         
-        # Find which data this order belongs to
-        for d in self.datas:
-            if self.orders[d] == order:
-                if order.status in [order.Completed]:
-                    if order.isbuy():
-                        self.log(f'{d._name} BUY EXECUTED @ {order.executed.price:.2f}')
-                    else:
-                        self.log(f'{d._name} SELL EXECUTED @ {order.executed.price:.2f}')
-                elif order.status in [order.Canceled, order.Margin, order.Rejected]:
-                    self.log(f'{d._name} ORDER FAILED')
-                
-                self.orders[d] = None
-                break
+        # Find which data this order belongs to (notifications carry a
+        # clone of the order, so look it up by ref)
+        i = self._order_to_idx.pop(order.ref, None)
+        if i is None:
+            return
+        
+        d = self.datas[i]
+        if order.status in [order.Completed]:
+            if order.isbuy():
+                self.log(f'{d._name} BUY EXECUTED @ {order.executed.price:.2f}')
+            else:
+                self.log(f'{d._name} SELL EXECUTED @ {order.executed.price:.2f}')
+        elif order.status in [order.Canceled, order.Margin, order.Rejected]:
+            self.log(f'{d._name} ORDER FAILED')
+        
+        self.orders[i] = None
+        
+        # Refresh the feed's position bit now that the order is done
+        if self.getposition(d).size:
+            self._in_position |= 1 << i
+        else:
+            self._in_position &= ~(1 << i)
     
-    def get_position_size_for_data(self, data):
-        """Calculate position size for specific data feed"""
+    def get_position_size_for_data(self, i, t):
+        """Calculate position size for data feed i at its bar t"""
         value = self.broker.getvalue()
         max_invest = value * self.params.max_position_size
-        price = data.close[0]
-        size = int(max_invest / price)
+        size = int(max_invest * self._inv_close[i, t])
         return size
 
 
@@ -137,33 +197,44 @@ class SimpleMAFilterStrategy(BaseStrategy):
     def __init__(self):
         super().__init__()
         
-        self.ma_200 = {}
-        self.orders = {}
-        self.buy_prices = {}
+        # 200-day MA of every feed, one row per feed, read by bar index
+        closes = _stack_closes(self.datas)
+        self.ma_200 = rolling_mean_2d(closes, self.params.ma_period)
+        self._inv_close = 1.0 / closes
+        self._warmup = self.params.ma_period
         
-        for d in self.datas:
-            self.ma_200[d] = bt.ind.SMA(d.close, period=self.params.ma_period)
-            self.orders[d] = None
-            self.buy_prices[d] = None
+        # Per-feed state indexed by data position; stop loss / take profit
+        # prices are set at each buy and NaN while flat
+        self.orders = [None] * len(self.datas)
+        self._order_to_idx = {}  # order.ref -> feed index, for notify_order
+        self._in_position = 0  # bit i set while feed i has an open position
+        self.sl_px = np.full(len(self.datas), np.nan)
+        self.tp_px = np.full(len(self.datas), np.nan)
     
     def prenext(self):
         self.next()
     
     def next(self):
-        for d in self.datas:
-            if self.orders[d]:
+        # Nothing to do until the 200-MA exists
+        if len(self) < self._warmup:
+            return
+        
+        for i, d in enumerate(self.datas):
+            if self.orders[i]:
                 continue
             
-            pos = self.getposition(d)
-            above_ma = d.close[0] > self.ma_200[d][0]
+            t = len(d) - 1
+            above_ma = d.close[0] > self.ma_200[i, t]
             
-            if not pos:
+            if not (self._in_position >> i) & 1:
                 # Buy when price crosses above 200-MA
-                if above_ma and d.close[-1] <= self.ma_200[d][-1]:
-                    size = self.get_position_size_for_data(d)
+                if above_ma and t > 0 and d.close[-1] <= self.ma_200[i, t - 1]:
+                    size = self.get_position_size_for_data(i, t)
                     if size > 0:
-                        self.orders[d] = self.buy(data=d, size=size)
-                        self.buy_prices[d] = d.close[0]
+                        self.orders[i] = self.buy(data=d, size=size)
+                        self._order_to_idx[self.orders[i].ref] = i
+                        self.sl_px[i] = d.close[0] * (1.0 - self.params.stop_loss)
+                        self.tp_px[i] = d.close[0] * (1.0 + self.params.take_profit)
                         self.log(f'BUY {d._name} @ {d.close[0]:.2f}')
             else:
                 # Sell when price crosses below 200-MA
@@ -173,38 +244,46 @@ class SimpleMAFilterStrategy(BaseStrategy):
                 if not above_ma:
                     sell = True
                     reason = "BELOW 200-MA"
-                elif self.buy_prices[d] and (d.close[0] / self.buy_prices[d] - 1) <= -self.params.stop_loss:
+                elif d.close[0] <= self.sl_px[i]:
                     sell = True
                     reason = "STOP LOSS"
-                elif self.buy_prices[d] and (d.close[0] / self.buy_prices[d] - 1) >= self.params.take_profit:
+                elif d.close[0] >= self.tp_px[i]:
                     sell = True
                     reason = "TAKE PROFIT"
                 
                 if sell:
-                    self.orders[d] = self.close(data=d)
+                    self.orders[i] = self.close(data=d)
+                    self._order_to_idx[self.orders[i].ref] = i
                     self.log(f'SELL {d._name} @ {d.close[0]:.2f} - {reason}')
-                    self.buy_prices[d] = None
+                    self.sl_px[i] = self.tp_px[i] = np.nan
     
     def notify_order(self, order):
         if order.status in [order.Submitted, order.Accepted]:
             return
         
-        for d in self.datas:
-            if self.orders[d] == order:
-                if order.status in [order.Completed]:
-                    if order.isbuy():
-                        self.log(f'{d._name} BUY EXECUTED @ {order.executed.price:.2f}')
-                    else:
-                        self.log(f'{d._name} SELL EXECUTED @ {order.executed.price:.2f}')
-                elif order.status in [order.Canceled, order.Margin, order.Rejected]:
-                    self.log(f'{d._name} ORDER FAILED')
-                
-                self.orders[d] = None
-                break
+        i = self._order_to_idx.pop(order.ref, None)
+        if i is None:
+            return
+        
+        d = self.datas[i]
+        if order.status in [order.Completed]:
+            if order.isbuy():
+                self.log(f'{d._name} BUY EXECUTED @ {order.executed.price:.2f}')
+            else:
+                self.log(f'{d._name} SELL EXECUTED @ {order.executed.price:.2f}')
+        elif order.status in [order.Canceled, order.Margin, order.Rejected]:
+            self.log(f'{d._name} ORDER FAILED')
+        
+        self.orders[i] = None
+        
+        # Refresh the feed's position bit now that the order is done
+        if self.getposition(d).size:
+            self._in_position |= 1 << i
+        else:
+            self._in_position &= ~(1 << i)
     
-    def get_position_size_for_data(self, data):
+    def get_position_size_for_data(self, i, t):
         value = self.broker.getvalue()
         max_invest = value * self.params.max_position_size
-        price = data.close[0]
-        size = int(max_invest / price)
+        size = int(max_invest * self._inv_close[i, t])
         return size
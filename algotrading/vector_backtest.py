@@ -0,0 +1,378 @@
+"""
+Vectorized strategy comparison and parameter sweeps
+
+Fast screening paths: every indicator is computed once over the whole price
+series and all strategies / parameter combinations are simulated together.
+The strategy comparison uses vectorbt; the SMA grid is plain NumPy. The
+Backtrader engine remains the reference implementation (orders there fill on
+the next bar, stops and targets are applied per bar), so numbers are close
+but not identical.
+"""
+import numpy as np
+import pandas as pd
+from indicators import IndicatorSet, sma_cross
+from _njit import njit, prange, prebuilt
+
+# One row per round trip from simulate_trades
+TRADE_DTYPE = np.dtype([
+    ('entry_bar', 'i8'),
+    ('exit_bar', 'i8'),
+    ('entry_price', 'f8'),
+    ('exit_price', 'f8'),
+    ('return', 'f8'),
+    ('exit_reason', 'i1')
+])
+
+# One row per round trip from simulate_universe, with the feed row and share count
+UNIVERSE_TRADE_DTYPE = np.dtype([('asset', 'i8')] + TRADE_DTYPE.descr + [('size', 'i8')])
+
+# exit_reason codes
+EXIT_SIGNAL, EXIT_STOP_LOSS, EXIT_TAKE_PROFIT, EXIT_OPEN = 0, 1, 2, 3
+
+
+def build_signals(price, fast=20, slow=50, rsi_period=14, oversold=30, overbought=70,
+                  fast_ema=12, slow_ema=26, signal=9, bb_period=20, bb_dev=2):
+    """Build entry/exit DataFrames with one column per strategy"""
+    import vectorbt as vbt
+    
+    sma_fast = vbt.MA.run(price, fast)
+    sma_slow = vbt.MA.run(price, slow)
+    rsi = vbt.RSI.run(price, rsi_period)
+    macd = vbt.MACD.run(price, fast_window=fast_ema, slow_window=slow_ema,
+                        signal_window=signal, macd_ewm=True, signal_ewm=True)
+    bbands = vbt.BBANDS.run(price, window=bb_period, alpha=bb_dev)
+    
+    # Raw boolean arrays so the columns line up regardless of indicator params
+    sma_up = sma_fast.ma.values > sma_slow.ma.values
+    rsi_val = rsi.rsi.values
+    macd_up = macd.macd.values > macd.signal.values
+    close = price.values
+    
+    # Combo strategy: at least 2 of 3 signals agree
+    bullish = sma_up.astype(int) + (rsi_val < oversold) + macd_up
+    bearish = (~sma_up).astype(int) + (rsi_val > overbought) + (~macd_up)
+    
+    entries = pd.DataFrame({
+        "SMA Crossover": sma_fast.ma_crossed_above(sma_slow).values,
+        "RSI Mean Reversion": rsi_val < oversold,
+        "MACD Trend": macd.macd_crossed_above(macd.signal).values,
+        "Bollinger Bands": close < bbands.lower.values,
+        "Multi-Strategy Combo": bullish >= 2,
+    }, index=price.index)
+    
+    exits = pd.DataFrame({
+        "SMA Crossover": sma_fast.ma_crossed_below(sma_slow).values,
+        "RSI Mean Reversion": rsi_val > overbought,
+        "MACD Trend": macd.macd_crossed_below(macd.signal).values,
+        "Bollinger Bands": close > bbands.upper.values,
+        "Multi-Strategy Combo": bearish >= 2,
+    }, index=price.index)
+    
+    return entries, exits
+
+
+def run_vectorized_comparison(price, initial_cash=100000, commission=0.001,
+                              stop_loss=0.05, take_profit=0.15, max_position_size=0.2):
+    """Simulate all strategies in one vectorbt portfolio
+
+    Returns a DataFrame with the same columns as BacktestEngine.compare_metrics
+    so it can be combined with benchmarks and fed to the report generator.
+    """
+    import vectorbt as vbt
+    
+    entries, exits = build_signals(price)
+    
+    portfolio = vbt.Portfolio.from_signals(
+        price, entries, exits,
+        init_cash=initial_cash,
+        fees=commission,
+        size=max_position_size,
+        size_type='percent',
+        sl_stop=stop_loss,
+        tp_stop=take_profit,
+        freq='1D'
+    )
+    
+    trades = portfolio.trades
+    df = pd.DataFrame({
+        'Strategy': entries.columns,
+        'Final Value': portfolio.final_value().values,
+        'Return %': portfolio.total_return().values * 100,
+        'Total Trades': trades.count().values,
+        'Win Rate %': trades.win_rate().fillna(0).values * 100,
+        'Profit Factor': trades.profit_factor().fillna(0).values,
+        'Max DD %': -portfolio.max_drawdown().values * 100,
+        'Sharpe Ratio': portfolio.sharpe_ratio().fillna(0).values
+    })
+    
+    return df.sort_values('Return %', ascending=False)
+
+
+def vectorized_sma_grid(close, fast_periods, slow_periods, position_size=0.2, commission=0.001):
+    """Long-only SMA crossover backtest over every (fast, slow) pair at once
+    
+    A position opens on the first fast-above-slow cross, is held while fast
+    stays above slow, and earns close-to-close returns from the next bar.
+    Returns one row per combination with the same metric columns as the
+    Backtrader sweep.
+    """
+    close = np.asarray(close, dtype=np.float64)
+    fast_periods = np.asarray(fast_periods)
+    slow_periods = np.asarray(slow_periods)
+    
+    # Every SMA comes from one shared prefix sum; repeated periods are cached.
+    # The SMAs are only compared against each other, so they are float32 -
+    # half the memory for the repeated (combination, bar) SMA grids
+    indicators = IndicatorSet(close)
+    fast = np.vstack([indicators.sma(p) for p in fast_periods]).astype(np.float32)
+    slow = np.vstack([indicators.sma(p) for p in slow_periods]).astype(np.float32)
+    
+    # (fast, slow, bar) grids flattened to one row per combination
+    fast = np.repeat(fast, len(slow_periods), axis=0)
+    slow = np.tile(slow, (len(fast_periods), 1))
+    
+    above = fast > slow
+    valid = ~(np.isnan(fast) | np.isnan(slow))
+    cross_up = np.zeros_like(above)
+    cross_up[:, 1:] = above[:, 1:] & ~above[:, :-1] & valid[:, :-1]
+    position = above & (np.cumsum(cross_up, axis=1) > 0)
+    
+    # Hold the previous bar's position; pay commission on every change
+    held = np.zeros(position.shape)
+    held[:, 1:] = position[:, :-1]
+    bar_ret = np.zeros(close.size)
+    bar_ret[1:] = close[1:] / close[:-1] - 1
+    turnover = np.abs(np.diff(held, axis=1, prepend=0.0))
+    returns = position_size * (held * bar_ret - turnover * commission)
+    
+    equity = np.cumprod(1 + returns, axis=1)
+    peak = np.maximum.accumulate(equity, axis=1)
+    max_dd = ((peak - equity) / peak).max(axis=1)
+    
+    std = returns.std(axis=1)
+    sharpe = np.divide(returns.mean(axis=1), std, out=np.zeros_like(std), where=std > 0) * np.sqrt(252)
+    
+    return pd.DataFrame({
+        'Fast': np.repeat(fast_periods, len(slow_periods)),
+        'Slow': np.tile(slow_periods, len(fast_periods)),
+        'Return %': (equity[:, -1] - 1) * 100,
+        'Sharpe': sharpe,
+        'Max DD %': max_dd * 100
+    })
+
+
+@njit(cache=True)
+def simulate_exits(close, entry_bar, entry_price, stop_loss, take_profit, end):
+    """First bar in (entry_bar, end) whose close hits the stop loss or take profit
+    
+    Returns (bar, EXIT_STOP_LOSS / EXIT_TAKE_PROFIT), or (-1, EXIT_SIGNAL) if
+    neither is hit before end.
+    """
+    # Exit prices once per trade, so each bar is two compares, no divide
+    sl_px = entry_price * (1.0 - stop_loss)
+    tp_px = entry_price * (1.0 + take_profit)
+    for k in range(entry_bar + 1, end):
+        if close[k] <= sl_px:
+            return k, EXIT_STOP_LOSS
+        if close[k] >= tp_px:
+            return k, EXIT_TAKE_PROFIT
+    return -1, EXIT_SIGNAL
+
+
+def simulate_trades(close, signals, stop_loss=0.05, take_profit=0.15):
+    """Long-only round trips from a per-bar +1 entry / -1 exit / 0 signal array
+    
+    Mirrors the BaseStrategy rules: enter on an entry signal while flat, leave
+    on the first later bar with an exit signal or a close beyond the stop loss
+    or take profit, and re-enter from the bar after an exit. Fills are at the
+    signal bar's close. Work is per trade - the next entry and signal exit are
+    found with searchsorted, the stop/target scan runs in simulate_exits -
+    rather than per bar. A trade still open at the end is reported at the
+    last close with EXIT_OPEN.
+    
+    Returns a TRADE_DTYPE structured array.
+    """
+    close = np.asarray(close, dtype=np.float64)
+    n = close.size
+    entry_bars = np.flatnonzero(signals > 0)
+    exit_bars = np.flatnonzero(signals < 0)
+    
+    scan = prebuilt(simulate_exits)
+    trades = []
+    j = 0
+    while j < entry_bars.size:
+        entry = entry_bars[j]
+        entry_price = close[entry]
+        
+        # First exit signal after the entry, else run to the end of the data
+        k = np.searchsorted(exit_bars, entry, side='right')
+        end = exit_bars[k] if k < exit_bars.size else n
+        
+        # Stops and targets are checked on the bars before that
+        exit_bar, reason = scan(close, entry, entry_price, stop_loss, take_profit, end)
+        if exit_bar < 0:
+            exit_bar, reason = (end, EXIT_SIGNAL) if end < n else (n - 1, EXIT_OPEN)
+            
+        exit_price = close[exit_bar]
+        trades.append((entry, exit_bar, entry_price, exit_price,
+                       exit_price / entry_price - 1, reason))
+        j = np.searchsorted(entry_bars, exit_bar, side='right')
+        
+    return np.array(trades, dtype=TRADE_DTYPE)
+
+
+@njit(cache=True)
+def _universe_kernel(closes, ma_200, cross, stop_loss, take_profit, max_position_size,
+                     cash, commission, warmup, capacity):
+    """Bar-by-bar account for simulate_universe; trades are written to arrays
+    of length capacity and the first count rows are valid"""
+    n_assets, n_bars = closes.shape
+    shares = np.zeros(n_assets, dtype=np.int64)
+    last_px = np.zeros(n_assets)
+    entry_bar = np.zeros(n_assets, dtype=np.int64)
+    entry_px = np.zeros(n_assets)
+    sl_px = np.zeros(n_assets)
+    tp_px = np.zeros(n_assets)
+    
+    t_asset = np.empty(capacity, dtype=np.int64)
+    t_entry = np.empty(capacity, dtype=np.int64)
+    t_exit = np.empty(capacity, dtype=np.int64)
+    t_size = np.empty(capacity, dtype=np.int64)
+    t_reason = np.empty(capacity, dtype=np.int64)
+    t_entry_px = np.empty(capacity)
+    t_exit_px = np.empty(capacity)
+    count = 0
+    
+    for t in range(n_bars):
+        for i in range(n_assets):
+            if not np.isnan(closes[i, t]):
+                last_px[i] = closes[i, t]
+        if t < warmup - 1:
+            continue
+            
+        # Position sizes use the value at the start of the bar, like
+        # broker.getvalue() before this bar's orders fill
+        value = cash
+        for i in range(n_assets):
+            value += shares[i] * last_px[i]
+            
+        for i in range(n_assets):
+            c = closes[i, t]
+            if np.isnan(c):
+                continue
+            above_ma = c > ma_200[i, t]
+            
+            if shares[i] == 0:
+                if cross[i, t] > 0 and above_ma:
+                    size = int(value * max_position_size / c)
+                    cost = size * c
+                    if size > 0 and cost * (1.0 + commission) <= cash:
+                        cash -= cost * (1.0 + commission)
+                        shares[i] = size
+                        entry_bar[i] = t
+                        entry_px[i] = c
+                        sl_px[i] = c * (1.0 - stop_loss)
+                        tp_px[i] = c * (1.0 + take_profit)
+            else:
+                reason = -1
+                if cross[i, t] < 0 or not above_ma:
+                    reason = EXIT_SIGNAL
+                elif c <= sl_px[i]:
+                    reason = EXIT_STOP_LOSS
+                elif c >= tp_px[i]:
+                    reason = EXIT_TAKE_PROFIT
+                if reason >= 0:
+                    cash += shares[i] * c * (1.0 - commission)
+                    t_asset[count], t_entry[count], t_exit[count] = i, entry_bar[i], t
+                    t_entry_px[count], t_exit_px[count] = entry_px[i], c
+                    t_size[count], t_reason[count] = shares[i], reason
+                    count += 1
+                    shares[i] = 0
+                    
+    # Positions still open are reported at their last close
+    for i in range(n_assets):
+        if shares[i] != 0:
+            t_asset[count], t_entry[count], t_exit[count] = i, entry_bar[i], n_bars - 1
+            t_entry_px[count], t_exit_px[count] = entry_px[i], last_px[i]
+            t_size[count], t_reason[count] = shares[i], EXIT_OPEN
+            count += 1
+            cash += shares[i] * last_px[i]
+            
+    return t_asset, t_entry, t_exit, t_entry_px, t_exit_px, t_size, t_reason, count, cash
+
+
+def simulate_universe(closes, ma_200, cross, stop_loss=0.05, take_profit=0.15,
+                      max_position_size=0.30, initial_cash=100000, commission=0.001,
+                      warmup=1):
+    """UniverseRotationStrategy rules over (feed, bar) arrays in one compiled loop
+    
+    Rows are feeds, laid out like universe_strategy._stack_closes. From bar
+    warmup - 1 on, a flat feed buys when its crossover is +1 and its close is
+    above ma_200, sized from the account value at the start of the bar; a held
+    feed sells on a -1 crossover, a close at or below ma_200, or its stop loss
+    or take profit. Fills are at the signal bar's close with commission
+    charged both ways, and a buy the cash cannot cover is skipped - a fast
+    approximation of the backtrader run, which fills on the next bar.
+    
+    Returns (UNIVERSE_TRADE_DTYPE array, final account value), with open
+    positions valued and reported (EXIT_OPEN) at their last close.
+    """
+    closes = np.ascontiguousarray(closes, dtype=np.float64)
+    
+    # Each trade starts on a +1 crossover bar
+    capacity = int((cross > 0).sum())
+    *fields, count, value = _universe_kernel(
+        closes, ma_200, cross, float(stop_loss), float(take_profit),
+        float(max_position_size), float(initial_cash), float(commission), int(warmup), capacity
+    )
+    asset, entry_bar, exit_bar, entry_price, exit_price, size, reason = (a[:count] for a in fields)
+    
+    trades = np.empty(count, dtype=UNIVERSE_TRADE_DTYPE)
+    trades['asset'] = asset
+    trades['entry_bar'] = entry_bar
+    trades['exit_bar'] = exit_bar
+    trades['entry_price'] = entry_price
+    trades['exit_price'] = exit_price
+    trades['return'] = exit_price / entry_price - 1
+    trades['exit_reason'] = reason
+    trades['size'] = size
+    return trades, value
+
+
+@njit(cache=True)
+def _compound_return(close, signals, stop_loss, take_profit):
+    """Compounded return of the simulate_trades round trips, fully invested"""
+    n = close.size
+    equity = 1.0
+    entry_price = sl_px = tp_px = 0.0
+    in_position = False
+    for t in range(n):
+        if not in_position:
+            if signals[t] > 0:
+                in_position = True
+                entry_price = close[t]
+                sl_px = entry_price * (1.0 - stop_loss)
+                tp_px = entry_price * (1.0 + take_profit)
+        elif signals[t] < 0 or close[t] <= sl_px or close[t] >= tp_px:
+            equity *= close[t] / entry_price
+            in_position = False
+    if in_position:
+        equity *= close[n - 1] / entry_price
+    return equity - 1.0
+
+
+@njit(cache=True, parallel=True)
+def sweep_sma_crossover(close, fasts, slows, stop_loss=0.05, take_profit=0.15):
+    """SMACrossover return over every (fast, slow) pair, pairs run in parallel
+    
+    Each grid point computes its SMAs and crossover with sma_cross and trades
+    them by the simulate_trades rules, stops and targets included. Returns a
+    (len(fasts), len(slows)) array of compounded returns.
+    """
+    n_slow = slows.size
+    out = np.empty((fasts.size, n_slow))
+    for k in prange(fasts.size * n_slow):
+        i, j = k // n_slow, k % n_slow
+        _, _, cross = sma_cross(close, fasts[i], slows[j])
+        out[i, j] = _compound_return(close, cross, stop_loss, take_profit)
+    return out